@@ -0,0 +1,228 @@
+import asyncio
+import logging
+from collections.abc import Iterator
+from tempfile import SpooledTemporaryFile
+
+from requests import codes as req_codes
+from requests.structures import CaseInsensitiveDict
+
+from .DAGRCache import SynchronizedCache
+from .exceptions import DagrException, DagrHTTPException
+from .utils import CHUNK_SIZE, SPOOL_MAX_SIZE, StatefulBrowser, iter_chunks
+
+try:
+    import aiohttp
+except ModuleNotFoundError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncResponse():
+    def __init__(self, url, status_code, headers, content=None, body=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.__content = content
+        # Streamed media bodies are spooled instead of held as bytes
+        self.__body = body
+
+    @property
+    def content(self):
+        if self.__content is None and not self.__body is None:
+            self.__body.seek(0)
+            self.__content = self.__body.read()
+        return self.__content
+
+    @property
+    def text(self):
+        return self.content.decode('utf8', errors='replace')
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        if self.__body is None:
+            return iter_chunks(self.content, chunk_size)
+        self.__body.seek(0)
+        return iter_chunks(self.__body, chunk_size)
+
+    def close(self):
+        if not self.__body is None:
+            self.__body.close()
+            self.__body = None
+
+
+class DAGRAsync():
+    def __init__(self, ripper):
+        if aiohttp is None:
+            raise DagrException(
+                'Required package aiohttp not available')
+        self.ripper = ripper
+        self.config = ripper.config
+        self.__concurrency = self.config.get('dagr.async', 'concurrency')
+        self.__loop = None
+        self.__session = None
+        self.__semaphore = None
+
+    def run(self):
+        # The ripper's run, crawl and cache handling is reused as is,
+        # only processing the deviations is done on the event loop
+        self.__loop = asyncio.new_event_loop()
+        try:
+            self.__loop.run_until_complete(self.open_session())
+            logger.info('Async engine concurrency: %s', self.__concurrency)
+            self.ripper.deviations_engine = self
+            self.ripper.run()
+        finally:
+            self.ripper.deviations_engine = None
+            self.__loop.run_until_complete(self.close_session())
+            self.__loop.close()
+            self.__loop = None
+
+    async def open_session(self):
+        browser_session = self.ripper.browser.session
+        self.__session = aiohttp.ClientSession(
+            headers=dict(browser_session.headers),
+            cookies={c.name: c.value for c in browser_session.cookies},
+            timeout=aiohttp.ClientTimeout(total=150))
+        self.__semaphore = asyncio.Semaphore(self.__concurrency)
+
+    async def close_session(self):
+        if not self.__session is None:
+            await self.__session.close()
+        self.__session = None
+
+    async def fetch(self, url, rate_class, headers=None, stream=False):
+        if hasattr(url, 'attrs') and 'href' in url.attrs:
+            url = self.ripper.browser.absolute_url(url['href'])
+        delay = self.ripper.rate_limiter.reserve(rate_class)
+        if delay > 0:
+            logger.log(15, 'Need to sleep for %.4f seconds (%s)', delay, rate_class)
+            await asyncio.sleep(delay)
+        async with self.__semaphore:
+            async with self.__session.get(url, headers=headers) as resp:
+                self.ripper.rate_limiter.feedback(resp.status, resp.headers)
+                if not stream:
+                    content = await resp.read()
+                    return AsyncResponse(str(resp.url), resp.status, resp.headers, content)
+                body = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+                try:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        body.write(chunk)
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    # The partial body is still saved, the size check in
+                    # write_bytes keeps it as a .tmp file to resume from
+                    logger.warning('Body of %s cut off after %s bytes',
+                                   url, body.tell(), exc_info=True)
+                return AsyncResponse(str(resp.url), resp.status, resp.headers, body=body)
+
+    async def fetch_media(self, dp, flink):
+        # Same Range and validator handling as the processor's get_response
+        partial = await asyncio.to_thread(dp.get_partial)
+        if not partial is None:
+            resp = await self.fetch(flink, 'media', headers=dp.range_headers(partial), stream=True)
+            try:
+                offset = dp.range_offset(resp, partial)
+            except DagrHTTPException:
+                resp.close()
+                raise
+            if not offset is None:
+                dp.set_response(resp, offset)
+                return
+            resp.close()
+        resp = await self.fetch(flink, 'media', stream=True)
+        if not resp.status_code == req_codes.ok:
+            resp.close()
+            raise DagrException(
+                f"Incorrect status code : {resp.status_code}")
+        dp.set_response(resp)
+
+    def process_deviations(self, cache, pages, **options):
+        return self.__loop.run_until_complete(
+            self.process_deviations_async(cache, pages, **options))
+
+    async def process_deviations_async(self, cache, pages, verify_exists=False, verify_best=False, overwrite=False, callback=None):
+        sync_cache = SynchronizedCache(cache)
+        progress = self.ripper.progress()
+        page_count = '?' if isinstance(pages, Iterator) else len(pages)
+        completed = 0
+        idle = []
+
+        async def process(count, link):
+            logger.info(
+                'Processing deviation %s of %s ( %s )', count, page_count, link)
+            dp = None
+            try:
+                page_content = await self.fetch(link, 'page')
+                if idle:
+                    dp = self.ripper.reuse_processor(
+                        idle.pop(), sync_cache, link, verify_exists=verify_exists,
+                        page_content=page_content)
+                else:
+                    dp = self.ripper.deviation_processor(
+                        self.ripper, sync_cache, link, verify_exists=verify_exists,
+                        browser=StatefulBrowser(session=self.ripper.browser.session),
+                        page_content=page_content)
+                dp.browser.open_fake_page(page_content.content, page_content.url)
+                if not page_content.status_code == req_codes.ok:
+                    raise DagrHTTPException(page_content.status_code)
+                flink, _ltype = await asyncio.to_thread(dp.find_link)
+                if self.ripper.test:
+                    print(flink)
+                    return dp, None
+                prefetch = (overwrite or verify_best
+                            or await asyncio.to_thread(dp.cached_fname) is None)
+                if prefetch:
+                    await self.fetch_media(dp, flink)
+                if not await asyncio.to_thread(dp.download_needed):
+                    return dp, None
+                if not prefetch:
+                    await self.fetch_media(dp, flink)
+                await asyncio.to_thread(dp.download_link)
+            except DagrException as ex:
+                return dp, ex
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                return dp, DagrException(
+                    f'Failed to get url: {link} {type(ex).__name__.lower()}')
+            return dp, None
+
+        pending = set()
+        # Streamed crawls fetch the next gallery page while pulling a link
+        pages_iter = enumerate(pages, start=1)
+        while True:
+            while len(pending) < self.__concurrency * 2 and self.ripper.keep_running():
+                count, link = await asyncio.to_thread(next, pages_iter, (None, None))
+                if link is None:
+                    break
+                pending.add(asyncio.create_task(process(count, link)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                dp, ex = task.result()
+                completed += 1
+                if dp is None:
+                    if not ex is None:
+                        logger.warning('Download error: %s', str(ex))
+                        self.ripper.error_report.append(ex)
+                    continue
+                if ex is None:
+                    if not self.ripper.test:
+                        sync_cache.add_link(dp.page_link)
+                else:
+                    dp.handle_error(ex)
+                if callback:
+                    try:
+                        callback(page_type=dp.found_type, page_link=dp.page_link,
+                                 current_page=dp.get_current_page(), page_content=dp.get_page_content().content)
+                    except DagrHTTPException as ex:
+                        sync_cache.add_httperror(dp.page_link, ex)
+                        self.ripper.handle_download_error(dp.page_link, ex)
+                dp.close_response()
+                if hasattr(dp, 'reset'):
+                    idle.append(dp)
+                if (not verify_best) and progress > 0 and completed % progress == 0:
+                    await asyncio.to_thread(sync_cache.save)
+            if not self.ripper.keep_running(check_stop=progress > 0 and completed % progress == 0):
+                for task in pending:
+                    task.cancel()
+                return
+        await asyncio.to_thread(sync_cache.save, 'force' if self.ripper.fixartists else True)
@@ -2,19 +2,102 @@ import logging
 import random
 import re
 import string
+import threading
 import weakref
+from collections import OrderedDict
 from copy import copy
 from pathlib import Path, PurePosixPath
 from platform import node as get_hostname
 from pprint import pformat
 from time import time
 
+from .DAGRCacheIndex import (ArtistsIndex, FilenamesIndex, OrderedSet,
+                             PagesIndex)
+from .DAGRCacheJournal import DAGRCacheJournal, apply_artists_op
+from .DAGRDeviationIndex import DAGRDeviationIndex
 from .DAGRIo import DAGRIo
-from .utils import artist_from_url, get_remote_io, shorten_url
+from .exceptions import DagrException
+from .utils import (artist_from_url, deviation_id, get_remote_io,
+                    shorten_url)
 
 logger = logging.getLogger(__name__)
 
 
+# Only contents that are copied into index structures on load are kept,
+# those are never mutated so entries can be shared without copying
+LRU_CACHE_TYPES = ['existing_pages', 'filenames',
+                   'artists', 'no_link', 'queue', 'premium']
+
+
+class DAGRCacheFilesLRU():
+    def __init__(self):
+        self.__dirs = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, dir_key, cache_file, stamp):
+        with self.__lock:
+            entries = self.__dirs.get(dir_key)
+            if entries is None:
+                return None
+            self.__dirs.move_to_end(dir_key)
+            entry = entries.get(cache_file)
+            if entry is None:
+                return None
+            entry_stamp, contents = entry
+            if not entry_stamp == stamp:
+                del entries[cache_file]
+                return None
+            return contents
+
+    def put(self, dir_key, cache_file, stamp, contents, max_dirs):
+        with self.__lock:
+            entries = self.__dirs.setdefault(dir_key, {})
+            self.__dirs.move_to_end(dir_key)
+            entries[cache_file] = (stamp, contents)
+            while len(self.__dirs) > max_dirs:
+                evicted, _entries = self.__dirs.popitem(last=False)
+                logger.log(level=5, msg=f"Evicted {evicted} from cache files LRU")
+
+    def invalidate(self, dir_key, cache_file=None):
+        with self.__lock:
+            if cache_file is None:
+                self.__dirs.pop(dir_key, None)
+            elif dir_key in self.__dirs:
+                self.__dirs[dir_key].pop(cache_file, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__dirs.clear()
+
+
+loaded_cache_files = DAGRCacheFilesLRU()
+
+
+class SynchronizedCache():
+    def __init__(self, cache, lock=None):
+        self.__cache = cache
+        self.__lock = lock if lock is not None else threading.RLock()
+
+    @property
+    def cache(self):
+        return self.__cache
+
+    @property
+    def lock(self):
+        return self.__lock
+
+    def __getattr__(self, name):
+        with self.__lock:
+            attr = getattr(self.__cache, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self.__lock:
+                return attr(*args, **kwargs)
+        return locked
+
+
 class DAGRCache():
 
     @staticmethod
@@ -67,6 +150,8 @@ class DAGRCache():
         # self.__lock = None
         # self.__lock_path = None
         self.__warn_not_found = warn_not_found
+        self.__lru_dirs = self.dagr_config.get('dagr.cache', 'lru_dirs') or 0
+        self.__lru_key = str(cache_io.base_dir)
         config_preload_fileslist_policy = self.dagr_config.get(
             'dagr.cache', 'preload_fileslist_policy')
 
@@ -90,11 +175,43 @@ class DAGRCache():
         self.queue_name = self.settings.get('queue', '.queue')
         self.premium_name = self.settings.get('premium', '.premium')
         self.httperrors_name = self.settings.get('httperrors', '.httperrors')
-
-        if load_files is None:
-            load_files = [
-                'existing_pages', 'no_link', 'queue', 'premium', 'httperrors', 'files_list', 'artists', 'last_crawled'
-            ]
+        self.validators_name = self.settings.get('validators', '.validators')
+
+        self.__cache_types = {
+            'settings': self.settings_name,
+            'filenames': self.fn_name,
+            'downloadedpages': self.ep_name,
+            'artists': self.artists_name,
+            'crawled': self.crawled_name,
+            'nolink': self.nolink_name,
+            'queue': self.queue_name,
+            'premium': self.premium_name,
+            'httperrors': self.httperrors_name,
+            'validators': self.validators_name
+        }
+        serializers = self.dagr_config.get(
+            'dagr.cache.serializers', key_errors=False) or {}
+        default_serializer = serializers.get('default', 'json')
+        # Formats chosen by convert_serializer are kept in the settings file
+        serializers = {**serializers, **(self.settings.get('serializers') or {})}
+        self.__serializers = {cache_file: serializers.get(cache_type, default_serializer)
+                              if self.__cache_io.supports_serializers else None
+                              for cache_type, cache_file in self.__cache_types.items()}
+
+        self.__ep_journal = None
+        self.__fn_journal = None
+        self.__artists_journal = None
+        journal_enabled = bool(self.dagr_config.get('dagr.cache', 'journal'))
+        if self.__cache_io.supports_journal:
+            self.__ep_journal = self.__open_journal(
+                self.ep_name, journal_enabled)
+            self.__fn_journal = self.__open_journal(
+                self.fn_name, journal_enabled)
+            self.__artists_journal = self.__open_journal(
+                self.artists_name, journal_enabled)
+        elif journal_enabled:
+            logger.warning(
+                'Cache io does not support journals, using full snapshots')
 
         self.__excluded_fnames = [
             '.lock',
@@ -106,38 +223,62 @@ class DAGRCache():
             self.nolink_name,
             self.queue_name,
             self.premium_name,
-            self.httperrors_name
+            self.httperrors_name,
+            self.validators_name,
+            f"{self.fn_name}.journal",
+            f"{self.ep_name}.journal",
+            f"{self.artists_name}.journal"
         ]
 
         self.__excluded_fnames_regex = list(
             map(re.compile, map(re.escape, self.__excluded_fnames)))
         self.__excluded_fnames_regex.append(re.compile(r'.*\.tmp'))
 
-        self.__existing_pages_lower = None
-
-        self.__existing_pages = None if not 'existing_pages' in load_files else self.__load_ep()
-        self.__no_link = None if not 'no_link' in load_files else self.__load_nolink()
-        self.__queue = None if not 'queue' in load_files else self.__load_queue()
-        self.__premium = None if not 'premium' in load_files else self.__load_premium()
-        self.__httperrors = None if not 'httperrors' in load_files else self.__load_httperrors()
-        self.__files_list = None if not 'files_list' in load_files else self.__load_fileslist()
-        self.__artists = None if not 'artists' in load_files else self.__load_artists()
-        self.__last_crawled = None if not 'last_crawled' in load_files else self.__load_lastcrawled()
+        self.__existing_pages = None
+        self.__no_link = None
+        self.__queue = None
+        self.__premium = None
+        self.__httperrors = None
+        self.__httperrors_404 = None
+        self.__files_list = None
+        self.__fs_files = None
+        self.__artists = None
+        self.__last_crawled = None
+        self.__validators = None
 
-        self.__files_list_lower = None
         self.downloaded_pages = []
+        self.__artists_delta = []
+        self.__index_delta = []
 
+        self.__existing_pages_stale = False
+        self.__fileslist_stale = False
         self.__queue_stale = False
         self.__premium_stale = False
         self.__nolink_stale = False
         self.__httperrors_stale = False
+        self.__validators_stale = False
 
-        if not self.__existing_pages is None and not self.__use_short_urls == self.dagr_config.get('dagr.cache', 'shorturls'):
-            self.__convert_urls()
+        if load_files:
+            self.preload(load_files)
 
     def __del__(self):
         logger.debug('Destroying DAGRCache %s', self.__id)
 
+    def __open_journal(self, cache_name, enabled):
+        compact_threshold = self.dagr_config.get(
+            'dagr.cache', 'journalcompactthreshold')
+        if enabled:
+            return DAGRCacheJournal(self.__cache_io, cache_name, compact_threshold)
+        # Entries left by a journaled run are replayed and folded into
+        # the snapshot on the next save, otherwise they would be lost
+        journal = DAGRCacheJournal(
+            self.__cache_io, cache_name, compact_threshold, enabled=False)
+        if not self.__cache_io.exists(journal.journal_name, update_cache=False):
+            return None
+        logger.log(
+            level=15, msg=f"Journals disabled, existing {journal.journal_name} will be compacted")
+        return journal
+
     def __enter__(self):
         self.__cache_io.lock()
         return self
@@ -156,16 +297,36 @@ class DAGRCache():
             self.__queue = None
             self.__premium = None
             self.__httperrors = None
+            self.__httperrors_404 = None
             self.__files_list = None
+            self.__fs_files = None
             self.__artists = None
             self.__last_crawled = None
-            self.__files_list_lower = None
+            self.__validators = None
             self.downloaded_pages = None
+            self.__artists_delta = None
+            self.__index_delta = None
+
+    def preload(self, load_files):
+        loaders = {
+            'existing_pages': lambda: self.existing_pages,
+            'no_link': self.get_nolink,
+            'queue': self.get_queue,
+            'premium': self.get_premium,
+            'httperrors': self.get_httperrors,
+            'files_list': self.files_gen,
+            'artists': lambda: self.artists,
+            'last_crawled': lambda: self.last_crawled
+        }
+        for load_file in load_files:
+            if not load_file in loaders:
+                raise ValueError(f"Unkown cache type: {load_file}")
+            loaders[load_file]()
 
     def files_gen(self):
         if self.__files_list is None:
             self.__files_list = self.__load_fileslist()
-        return (f for f in self.__files_list if not any(r.match(f) for r in self.__excluded_fnames_regex))
+        return self.__files_list.visible()
 
     @property
     def base_dir(self): return PurePosixPath(self.__cache_io.base_dir)
@@ -177,20 +338,34 @@ class DAGRCache():
     def files_list(self):
         return list(self.files_gen())
 
+    def has_filename(self, fname):
+        if self.__files_list is None:
+            self.__files_list = self.__load_fileslist()
+        return self.__files_list.is_visible(fname)
+
+    def fs_exists(self, fname):
+        if self.__fs_files is None:
+            logger.log(level=15, msg='Listing directory for existence checks')
+            self.__fs_files = set(self.__cache_io.list_dir())
+        return fname in self.__fs_files
+
+    def missing_filenames(self):
+        fnames = set(self.files_gen())
+        if not fnames:
+            return set()
+        return fnames.difference(self.__cache_io.exists_many(fnames))
+
     @ property
     def existing_pages(self):
         if self.__existing_pages is None:
             self.__existing_pages = self.__load_ep()
+            if not self.__use_short_urls == self.dagr_config.get('dagr.cache', 'shorturls'):
+                self.__convert_urls()
         return self.__existing_pages
 
     @ property
     def existing_pages_lower(self):
-        if self.__existing_pages_lower is None:
-            logger.log(
-                level=15, msg='Generating lowercase existing pages cache')
-            self.__existing_pages_lower = [
-                l.lower() for l in self.existing_pages]
-        return self.__existing_pages_lower
+        return self.existing_pages.lower_keys()
 
     @ property
     def artists(self):
@@ -208,8 +383,31 @@ class DAGRCache():
     def cache_io(self):
         return weakref.proxy(self.__cache_io)
 
-    def __load_cache_file(self, cache_file, use_backup=True, warn_not_found=True):
-        return self.__cache_io.load_primary_or_backup(cache_file, use_backup=use_backup, warn_not_found=warn_not_found)
+    def __cache_file_stamp(self, cache_file):
+        if not self.__lru_dirs > 0:
+            return None
+        try:
+            stat = self.__cache_io.stat(cache_file)
+            return (stat.get('st_mtime'), stat.get('st_size'))
+        except Exception:
+            logger.log(level=4, msg=f"Unable to stat {cache_file}", exc_info=True)
+            return None
+
+    def __load_cache_file(self, cache_file, use_backup=True, warn_not_found=True, cache_type=None):
+        stamp = self.__cache_file_stamp(
+            cache_file) if cache_type in LRU_CACHE_TYPES else None
+        if not stamp is None:
+            cache_contents = loaded_cache_files.get(
+                self.__lru_key, cache_file, stamp)
+            if not cache_contents is None:
+                logger.log(level=15, msg=f"Using cached {cache_file} contents")
+                return cache_contents
+        cache_contents = self.__cache_io.load_primary_or_backup(
+            cache_file, use_backup=use_backup, warn_not_found=warn_not_found)
+        if not stamp is None and cache_contents:
+            loaded_cache_files.put(self.__lru_key, cache_file,
+                                   stamp, cache_contents, self.__lru_dirs)
+        return cache_contents
 
     def __load_cache(self, use_backup=True, warn_not_found=True, default=None, **kwargs):
         def filenames():
@@ -225,11 +423,12 @@ class DAGRCache():
             'no_link': lambda: [],
             'queue': lambda: [],
             'premium': lambda: [],
-            'httperrors': lambda: {}
+            'httperrors': lambda: {},
+            'validators': lambda: {}
         }
         for cache_type, cache_file in kwargs.items():
             cache_contents = self.__load_cache_file(
-                cache_file, use_backup=use_backup, warn_not_found=warn_not_found)
+                cache_file, use_backup=use_backup, warn_not_found=warn_not_found, cache_type=cache_type)
             if cache_contents:
                 yield cache_contents
             else:
@@ -244,32 +443,35 @@ class DAGRCache():
 
     def __load_ep(self):
         logger.log(level=15, msg='Loading existing pages')
-        return next(
+        existing_pages = PagesIndex(next(
             self.__load_cache(
                 existing_pages=self.ep_name,
-                warn_not_found=True if self.__warn_not_found is None else self.__warn_not_found))
+                warn_not_found=True if self.__warn_not_found is None else self.__warn_not_found)))
+        if not self.__ep_journal is None:
+            self.__ep_journal.replay(existing_pages)
+        return existing_pages
 
     def __load_nolink(self):
         logger.log(level=15, msg='Loading nolink')
-        return next(self.__load_cache(
+        return OrderedSet(next(self.__load_cache(
             no_link=self.nolink_name,
-            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found))
+            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found)))
 
     def __load_queue(self):
         logger.log(level=15, msg='Loading queue')
-        return next(self.__load_cache(
+        return OrderedSet(next(self.__load_cache(
             queue=self.queue_name,
-            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found))
+            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found)))
 
     def __load_premium(self):
         logger.log(level=15, msg='Loading premium')
-        return next(self.__load_cache(
+        return PagesIndex(next(self.__load_cache(
             premium=self.premium_name,
-            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found))
+            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found)))
 
     def __load_fileslist(self):
         logger.log(level=15, msg='Populating files list cache')
-        files_in_dir = set()
+        files_in_dir = FilenamesIndex(exclude=self.__is_excluded_fname)
         filenames_default = None
         if self.preload_fileslist_policy == 'enable':
             if self.preload_http_endpoint:
@@ -288,13 +490,21 @@ class DAGRCache():
             warn_not_found=True if self.__warn_not_found is None else self.__warn_not_found,
             default=filenames_default
         )) if not fn in self.__excluded_fnames)
+        if not self.__fn_journal is None:
+            self.__fn_journal.replay(files_in_dir)
         return files_in_dir
 
+    def __is_excluded_fname(self, fname):
+        return any(r.match(fname) for r in self.__excluded_fnames_regex)
+
     def __load_artists(self):
         logger.log(level=15, msg='Loading artists')
-        return next(self.__load_cache(
+        artists = ArtistsIndex(next(self.__load_cache(
             artists=self.artists_name,
-            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found))
+            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found)))
+        if not self.__artists_journal is None:
+            self.__artists_journal.replay(artists, apply_artists_op)
+        return artists
 
     def __load_httperrors(self):
         logger.log(level=15, msg='Loading http errors')
@@ -308,6 +518,12 @@ class DAGRCache():
             last_crawled=self.crawled_name,
             warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found))
 
+    def __load_validators(self):
+        logger.log(level=15, msg='Loading validators')
+        return next(self.__load_cache(
+            validators=self.validators_name,
+            warn_not_found=False if self.__warn_not_found is None else self.__warn_not_found))
+
     def __ep_exists(self):
         return self.__cache_io.exists(self.ep_name, update_cache=False)
 
@@ -321,28 +537,67 @@ class DAGRCache():
         return self.__cache_io.exists(self.settings_name, update_cache=False)
 
     def __update_cache(self, cache_file, cache_contents, do_backup=True):
-        if isinstance(cache_contents, set):
+        if isinstance(cache_contents, OrderedSet):
+            cache_contents = cache_contents.to_list()
+        elif isinstance(cache_contents, ArtistsIndex):
+            cache_contents = cache_contents.to_dict()
+        elif isinstance(cache_contents, set):
             cache_contents = list(cache_contents)
-        self.__cache_io.save_json(cache_file, cache_contents, do_backup)
+        loaded_cache_files.invalidate(self.__lru_key, cache_file)
+        self.__cache_io.save_json(cache_file, cache_contents, do_backup,
+                                  serializer=self.__serializers.get(cache_file))
+
+    def convert_serializer(self, serializer):
+        if not self.__cache_io.supports_serializers:
+            raise DagrException(
+                'Cache io does not support changing serializers')
+        converted = 0
+        for cache_type, cache_file in self.__cache_types.items():
+            self.__serializers[cache_file] = serializer
+            if cache_type == 'settings' or not self.__cache_io.exists(cache_file, update_cache=False):
+                continue
+            cache_contents = self.__load_cache_file(
+                cache_file, use_backup=False, warn_not_found=False)
+            if cache_contents is None:
+                continue
+            self.__update_cache(cache_file, cache_contents)
+            converted += 1
+        self.settings = dict(self.settings, serializers={
+            cache_type: serializer for cache_type in self.__cache_types})
+        self.__update_cache(self.settings_name, self.settings, False)
+        converted += 1
+        return converted
+
+    def __save_journaled(self, cache_file, cache_contents, journal, compact=False):
+        if journal is None:
+            self.__update_cache(cache_file, cache_contents)
+        elif compact or journal.needs_compact():
+            logger.log(level=15, msg=f"Compacting {cache_file} journal")
+            self.__update_cache(cache_file, cache_contents)
+            journal.reset()
+        else:
+            journal.flush()
 
     def __convert_urls(self):
         logger.warning(
             'Converting cache {} url format'.format(self.base_dir))
         short = self.dagr_config.get('dagr.cache', 'shorturls')
         base_url = self.dagr_config.get('deviantart', 'baseurl')
-        self.existing_pages = (
+        self.__existing_pages = PagesIndex(
             [shorten_url(p) for p in self.existing_pages] if short else
             ['{}/{}'.format(base_url, p) for p in self.existing_pages]
         )
         self.settings['shorturls'] = short
-        self.__update_cache(self.ep_name, self.existing_pages)
+        self.__save_journaled(
+            self.ep_name, self.existing_pages, self.__ep_journal, compact=True)
         self.__update_cache(self.settings_name, self.settings, False)
         self.update_artists(True)
 
     def update_artists(self, force=False):
-        updated_pages = self.existing_pages if force else self.downloaded_pages
+        updated_pages = self.existing_pages if force else self.__artists_delta
         logger.log(15, 'Sorting %s artist pages', len(updated_pages))
         existing_artists = self.artists
+        updated_count = 0
         for page in updated_pages:
             artist_url_p, artist_name, shortname = artist_from_url(page)
             err = f"Cache entry not found {self.base_dir} : {page} : {shortname}"
@@ -354,24 +609,73 @@ class DAGRCache():
             except StopIteration:
                 logger.error(err, exc_info=True)
                 raise
-            if not artist_name in existing_artists:
-                existing_artists[artist_name] = {
-                    'Home Page': str(artist_url_p), 'Artworks': {}}
-            existing_artists[artist_name]['Artworks'][rfn] = page
-        self.__update_cache(self.artists_name, existing_artists)
+            if existing_artists.add(artist_name, str(artist_url_p), rfn, page):
+                updated_count += 1
+                if not self.__artists_journal is None:
+                    self.__artists_journal.record(
+                        '+', artist_name, str(artist_url_p), rfn, page)
+        self.__artists_delta = []
+        logger.log(15, 'Updated %s artist pages', updated_count)
+        if force or not self.__artists_exists():
+            self.__save_journaled(
+                self.artists_name, existing_artists, self.__artists_journal, compact=True)
+        elif updated_count > 0:
+            self.__save_journaled(
+                self.artists_name, existing_artists, self.__artists_journal)
+
+    def deviation_entries(self, pages=None):
+        for page in (self.existing_pages if pages is None else pages):
+            dev_id = deviation_id(page)
+            if dev_id is None:
+                continue
+            try:
+                fname = self.real_filename(PurePosixPath(page).name)
+            except StopIteration:
+                logger.log(
+                    level=15, msg=f"No cache filename for page {page}")
+                continue
+            if not fname is None:
+                yield dev_id, fname, page
+
+    def update_deviation_index(self, deviation_index=None, full=False):
+        rel_dir = self.__cache_io.rel_dir_name
+        index = deviation_index if not deviation_index is None else DAGRDeviationIndex.create(
+            self.dagr_config, self.__cache_io)
+        try:
+            if full:
+                index.remove_dir(rel_dir)
+            # Only pages new to this folder since the last update are sent
+            pages = None if full else self.__index_delta
+            added = sum(1 for dev_id, fname, page in self.deviation_entries(
+                pages) if index.add(dev_id, rel_dir, fname, page))
+            logger.log(
+                level=15, msg=f"Added {added} entries to deviations index for {rel_dir}")
+            # A locked index keeps the delta to send with the next save
+            if not deviation_index is None or index.save():
+                self.__index_delta = []
+        finally:
+            if deviation_index is None:
+                index.close()
+        return added
+
+    def page_for_filename(self, fname):
+        return self.artists.page_for(fname)
 
     def rename_deviant(self, old, new):
         rn_count = 0
-        for pcount in range(0, len(self.existing_pages)):
-            ep = self.existing_pages[pcount]
+        renamed = []
+        for ep in self.existing_pages:
             artist_url_p = PurePosixPath(ep).parent.parent
             if artist_url_p.name == old:
                 result = ep.replace(old, new)
                 logger.log(4, 'Changing {} to {}'.format(ep, result))
-                self.existing_pages[pcount] = result
+                renamed.append(result)
                 rn_count += 1
+            else:
+                renamed.append(ep)
         if rn_count > 0:
-            self.downloaded_pages = True
+            self.__existing_pages = PagesIndex(renamed)
+            self.__existing_pages_stale = True
         return rn_count
 
     def save(self, save_artists=False):
@@ -385,13 +689,23 @@ class DAGRCache():
             self.__files_list) and bool(self.__existing_pages)
         if settings_missing:
             self.__update_cache(self.settings_name, self.settings, False)
-        if self.downloaded_pages or fix_fn:
-            self.__update_cache(self.fn_name, self.__files_list)
-        if self.downloaded_pages or fix_ep:
-            self.__update_cache(self.ep_name, self.__existing_pages)
+        # Pages can be downloaded without the files list ever being loaded
+        if (self.downloaded_pages or fix_fn or self.__fileslist_stale) and not self.__files_list is None:
+            self.__save_journaled(
+                self.fn_name, self.__files_list, self.__fn_journal, compact=fix_fn)
+            self.__fileslist_stale = False
+        if self.downloaded_pages or fix_ep or self.__existing_pages_stale:
+            self.__save_journaled(self.ep_name, self.__existing_pages, self.__ep_journal,
+                                  compact=fix_ep or self.__existing_pages_stale)
+            self.__existing_pages_stale = False
         if save_artists:
             if self.downloaded_pages or fix_artists or save_artists == 'force':
-                self.update_artists(save_artists == 'force')
+                self.update_artists(save_artists == 'force' or fix_artists)
+        if self.__index_delta:
+            if self.dagr_config.get('dagr.cache', 'deviationindex'):
+                self.update_deviation_index()
+            else:
+                self.__index_delta = []
         logger.log(level=5, msg=pformat(locals()))
 
     def save_extras(self, full_crawl):
@@ -432,6 +746,38 @@ class DAGRCache():
         else:
             self.last_crawled['short'] = time()
         self.__update_cache(self.crawled_name, self.last_crawled)
+        if self.__validators_stale:
+            self.save_validators()
+
+    def update_high_water(self, dev_id):
+        high_water = self.last_crawled.get('highwater')
+        if high_water is None or dev_id > high_water:
+            self.last_crawled['highwater'] = dev_id
+
+    def save_validators(self):
+        if not self.__validators is None:
+            self.__update_cache(self.validators_name, self.__validators)
+        self.__validators_stale = False
+
+    def discard_validators(self):
+        self.__validators = None
+        self.__validators_stale = False
+
+    def get_validators(self, url):
+        if self.__validators is None:
+            self.__validators = self.__load_validators()
+        return self.__validators.get(url)
+
+    def set_validators(self, url, validators):
+        if self.__validators is None:
+            self.__validators = self.__load_validators()
+        if self.__validators.get(url) == (validators or None):
+            return
+        if validators:
+            self.__validators[url] = validators
+        else:
+            self.__validators.pop(url, None)
+        self.__validators_stale = True
 
     def add_premium(self, page):
         if self.__premium is None:
@@ -439,19 +785,25 @@ class DAGRCache():
         if page in self.__premium:
             return
         self.remove_page_extras(page, 'premium')
-        self.__premium.append(page)
+        self.__premium.add(page)
         self.__premium_stale = True
 
     def get_premium(self):
         if self.__premium is None:
             self.__premium = self.__load_premium()
-        return copy(self.__premium)
+        return self.__premium.to_list()
 
     def get_httperrors(self):
         if self.__httperrors is None:
             self.__httperrors = self.__load_httperrors()
         return copy(self.__httperrors)
 
+    def __load_errors_404(self):
+        if self.__httperrors is None:
+            self.__httperrors = self.__load_httperrors()
+        return PagesIndex(k for k, v in self.__httperrors.items() if any(
+            e.get('error_code', None) == 404 for e in v))
+
     @ property
     def httperrors_exclude(self):
         return set([*self.downloaded_pages, *self.existing_pages])
@@ -459,7 +811,7 @@ class DAGRCache():
     def add_httperror(self, page, page_error):
         if self.__httperrors is None:
             self.__httperrors = self.__load_httperrors()
-        if not page in self.httperrors_exclude:
+        if not page in self.existing_pages:
             self.__httperrors_stale = True
             if not page in self.__httperrors:
                 self.__httperrors[page] = []
@@ -468,13 +820,26 @@ class DAGRCache():
                 'time': time(),
                 'error_code': page_error.http_code
             })
+            if page_error.http_code == 404 and not self.__httperrors_404 is None:
+                self.__httperrors_404.add(page)
 
     @ property
     def nl_exclude(self):
         if self.__no_link is None:
             self.__no_link = self.__load_nolink()
+        if self.__premium is None:
+            self.__premium = self.__load_premium()
+        if self.__httperrors is None:
+            self.__httperrors = self.__load_httperrors()
         return set([*self.downloaded_pages, *self.existing_pages, *self.__no_link, *self.__premium, *self.__httperrors])
 
+    def __nl_excluded(self, page, include_nolink=True):
+        if include_nolink and page in self.__no_link:
+            return True
+        return (page in self.existing_pages
+                or page in self.__premium
+                or page in self.__httperrors)
+
     def add_nolink(self, page):
         if self.__no_link is None:
             self.__no_link = self.__load_nolink()
@@ -482,80 +847,83 @@ class DAGRCache():
             self.__premium = self.__load_premium()
         if self.__httperrors is None:
             self.__httperrors = self.__load_httperrors()
-        if page in self.nl_exclude:
+        if self.__nl_excluded(page):
             return
         self.__nolink_stale = True
         self.remove_page_extras(page, 'nolink')
-        self.__no_link.append(page)
+        self.__no_link.add(page)
 
     def remove_nolink(self, pages):
         if self.__no_link is None:
             self.__no_link = self.__load_nolink()
-        remove = set([p for p in (pages if isinstance(pages, list)
-                                  else list(pages)) if p in self.__no_link])
-        rcount = len(remove)
+        rcount = sum(1 for p in pages if self.__no_link.discard(p))
         if rcount > 0:
             self.__nolink_stale = True
-            self.__no_link = list(set(self.__no_link) - remove)
         return rcount
 
     def prune_nolink(self):
         if self.__no_link is None:
             self.__no_link = self.__load_nolink()
+        if self.__premium is None:
+            self.__premium = self.__load_premium()
+        if self.__httperrors is None:
+            self.__httperrors = self.__load_httperrors()
         nlcount = len(self.__no_link)
-        keep = set(self.__no_link) - self.nl_exclude
-        kcount = len(keep)
-        delta = nlcount - kcount
+        self.__no_link = OrderedSet(p for p in self.__no_link
+                                    if not self.__nl_excluded(p, include_nolink=False))
+        delta = nlcount - len(self.__no_link)
         if not delta == 0:
             self.__nolink_stale = True
-            self.__no_link = list(keep)
         return delta
 
     def get_nolink(self):
         if self.__no_link is None:
             self.__no_link = self.__load_nolink()
-        return copy(self.__no_link)
+        return self.__no_link.to_list()
 
     def get_queue(self):
         if self.__queue is None:
             self.__queue = self.__load_queue()
-        return copy(self.__queue)
+        return self.__queue.to_list()
 
     @ property
     def q_exclude(self):
-        result = set()
         if self.__premium is None:
             self.__premium = self.__load_premium()
-        result.update((u.lower() for u in self.__premium))
-        if self.__httperrors is None:
-            self.__httperrors = self.__load_httperrors()
-        errors_404 = [k for k, v in self.__httperrors.items() if any(
-            e.get('error_code', None) == 404 for e in v)]
-        result.update((u.lower() for u in errors_404))
-        result.update((u.lower() for u in self.existing_pages))
-        return result
+        if self.__httperrors_404 is None:
+            self.__httperrors_404 = self.__load_errors_404()
+        return set([*self.__premium.lower_keys(), *self.__httperrors_404.lower_keys(),
+                    *self.existing_pages.lower_keys()])
+
+    def __q_excluded(self, page):
+        if self.__premium is None:
+            self.__premium = self.__load_premium()
+        if self.__httperrors_404 is None:
+            self.__httperrors_404 = self.__load_errors_404()
+        return (self.existing_pages.contains_lower(page)
+                or self.__premium.contains_lower(page)
+                or self.__httperrors_404.contains_lower(page))
 
     def add_queue(self, page):
         if self.__queue is None:
             self.__queue = self.__load_queue()
-        if page.lower() in self.q_exclude:
+        if self.__q_excluded(page):
             return
-        self.__queue_stale = True
-        self.__queue.append(page)
+        if self.__queue.add(page):
+            self.__queue_stale = True
 
     def update_queue(self, pages):
         if self.__queue is None:
             self.__queue = self.__load_queue()
-        exclude = self.q_exclude
-        logger.log(level=15, msg=f"Queue exclude length is {len(exclude)}")
-        keep = set(kp for kp in (p.lower()
-                   for p in self.__queue) if not kp in exclude)
-        enqueue = set(ep for ep in (p.lower() for p in pages)
-                      if not ep in exclude and not ep in keep)
-        ecount = len(enqueue)
+        keep = OrderedSet(kp for kp in (p.lower() for p in self.__queue)
+                          if not self.__q_excluded(kp))
+        ecount = 0
+        for ep in (p.lower() for p in pages):
+            if not self.__q_excluded(ep) and keep.add(ep):
+                ecount += 1
         if ecount > 0:
             self.__queue_stale = True
-            self.__queue = [*keep, *enqueue]
+            self.__queue = keep
             self.save_queue()
         return ecount
 
@@ -563,13 +931,11 @@ class DAGRCache():
         if self.__queue is None:
             self.__queue = self.__load_queue()
         qcount = len(self.__queue)
-        exclude = self.q_exclude
-        keep = set(u for u in self.__queue if not u.lower() in exclude)
-        kcount = len(keep)
-        delta = qcount - kcount
+        self.__queue = OrderedSet(
+            u for u in self.__queue if not self.__q_excluded(u))
+        delta = qcount - len(self.__queue)
         if not delta == 0:
             self.__queue_stale = True
-            self.__queue = list(keep)
         return delta
 
     def remove_page_extras(self, page, reason):
@@ -581,20 +947,19 @@ class DAGRCache():
             self.__premium = self.__load_premium()
         if self.__httperrors is None:
             self.__httperrors = self.__load_httperrors()
-        if page in self.__queue:
-            self.__queue.remove(page)
+        if self.__queue.discard(page):
             self.__queue_stale = True
             logger.log(level=5, msg=f"Removed {page} from queue")
-        if not reason == 'nolink' and page in self.__no_link:
-            self.__no_link.remove(page)
+        if not reason == 'nolink' and self.__no_link.discard(page):
             self.__nolink_stale = True
             logger.log(level=5, msg=f"Removed {page} from no-link list")
-        if not reason == 'premium' and page in self.__premium:
-            self.__premium.remove(page)
+        if not reason == 'premium' and self.__premium.discard(page):
             self.__premium_stale = True
             logger.log(level=5, msg=f"Removed {page} from premium list")
         if not reason == 'httperror' and page in self.__httperrors:
             del self.__httperrors[page]
+            if not self.__httperrors_404 is None:
+                self.__httperrors_404.discard(page)
             self.__httperrors_stale = True
             logger.log(level=5, msg=f"Removed {page} from httperrors list")
 
@@ -602,22 +967,34 @@ class DAGRCache():
         self.remove_page_extras(page, 'found')
         if self.__use_short_urls:
             page = shorten_url(page)
-        if page not in self.existing_pages:
+        dev_id = deviation_id(page)
+        if dev_id is None:
+            known = page in self.existing_pages
+        else:
+            known = self.existing_pages.contains_id(dev_id)
+        if not known:
             self.downloaded_pages.append(page)
-            self.existing_pages.append(page)
-            if page in self.__queue:
-                self.__queue.remove(page)
+            self.__artists_delta.append(page)
+            self.__index_delta.append(page)
+            self.existing_pages.add(page)
+            if not self.__ep_journal is None:
+                self.__ep_journal.record('+', page)
+            self.__queue.discard(page)
         elif self.dagr_config.get('dagr', 'overwrite'):
+            # Already indexed with this folder when it was first added
             self.downloaded_pages.append(page)
+            self.__artists_delta.append(page)
 
     def check_link(self, page):
         if self.__use_short_urls:
             page = shorten_url(page)
-        if page in self.existing_pages:
+        existing_pages = self.existing_pages
+        dev_id = deviation_id(page)
+        if not dev_id is None:
+            return existing_pages.contains_id(dev_id)
+        if page in existing_pages:
             return True
-        # logger.log(
-        #     level=5, msg='Checking for lowercase link {}'.format(page))
-        return page.lower() in self.existing_pages_lower
+        return existing_pages.contains_lower(page)
 
     def filter_links(self, links):
         return [l for l in links if not self.check_link(l)]
@@ -631,35 +1008,39 @@ class DAGRCache():
         else:
             logger.log(level=5, msg=f"Adding {fn} to filenames cache")
             self.__files_list.add(fn)
+            if not self.__fs_files is None:
+                self.__fs_files.add(fn)
+            if not self.__fn_journal is None:
+                self.__fn_journal.record('+', fn)
             self.__cache_io.update_fn_cache(fn)
-            # if not self.__files_list_lower is None:
-            # self.__files_list_lower[fn.lower()] = fn
 
     def real_filename(self, shortname):
+        if self.__files_list is None:
+            self.__files_list = self.__load_fileslist()
+        entry = self.__files_list.lookup(shortname)
+        if not entry is None:
+            return entry
+        dev_id = deviation_id(shortname)
+        if not dev_id is None:
+            entry = self.__files_list.lookup_id(dev_id)
+            if not entry is None:
+                return entry
         sn_lower = shortname.lower()
-        return next(fn for fn in self.files_list if sn_lower in fn.lower())
-
-        # if self.__files_list_lower is None:
-        #     logger.log(level=15, msg='Generating lowercase fn cache')
-        #     lower_gen = ((fn.lower(), fn)
-        #             for fn in self.files_gen())
-        #     self.__files_list_lower = dict(lower_gen)
-        #     logger.log(level=15, msg=f"Generated {len(self.__files_list_lower)} lowercase fn cache items")
-
-        # entry = self.__files_list_lower.get(sn_lower, None)
-        # if not entry is None:
-        #     logger.log(level=15, msg=f"Got lowercase fn cache hit {entry} for {sn_lower}")
-        #     return entry
-
-        # fll_values = self.__files_list_lower.values()
-
-        # for rfn, lfn in lower_gen:
-        #     self.__files_list_lower[lfn] = rfn
-        #     if lfn == sn_lower:
-        #         logger.log(level=15, msg=f"Got lcfn gen hit {rfn} for {sn_lower}")
-        #         return rfn
-
-        # return None
+        logger.log(level=5, msg=f"No fn index hit for {sn_lower}, scanning files list")
+        return next(fn for fn in self.files_gen() if sn_lower in fn.lower())
 
     def prune_filename(self, fname):
-        self.__files_list.discard(fname)
+        return self.prune_filenames([fname])
+
+    def prune_filenames(self, fnames):
+        if self.__files_list is None:
+            self.__files_list = self.__load_fileslist()
+        pruned = 0
+        for fname in fnames:
+            if self.__files_list.discard(fname):
+                pruned += 1
+                if not self.__fn_journal is None:
+                    self.__fn_journal.record('-', fname)
+        if pruned > 0:
+            self.__fileslist_stale = True
+        return pruned
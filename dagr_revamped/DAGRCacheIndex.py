@@ -0,0 +1,297 @@
+import logging
+import sys
+
+from .utils import deviation_id
+
+logger = logging.getLogger(__name__)
+
+def split_page(page, intern=True):
+    rest, sep, dev_id = page.rpartition('-')
+    if not sep or not dev_id.isdecimal() or not dev_id.isascii() or dev_id[0] == '0':
+        return None
+    art_idx = page.find('/art/')
+    if art_idx < 1 or len(rest) < art_idx + 5:
+        return None
+    artist_parts = page[:art_idx].split('/')
+    if len(artist_parts) == 4:
+        scheme, empty, host, artist = artist_parts
+        if not scheme.endswith(':') or empty or not host or not artist:
+            return None
+    elif not len(artist_parts) == 1:
+        return None
+    head = page[:art_idx + 5]
+    if intern:
+        head = sys.intern(head)
+    return head, rest[art_idx + 5:], int(dev_id)
+
+
+def join_page(head, slug, dev_id):
+    return f"{head}{slug}-{dev_id}"
+
+
+class OrderedSet():
+    def __init__(self, items=None):
+        self._items = dict()
+        if items is not None:
+            self.update(items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __reversed__(self):
+        return reversed(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def __copy__(self):
+        return self.__class__(self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self)})"
+
+    def add(self, item):
+        if item in self._items:
+            return False
+        self._items[item] = None
+        return True
+
+    def append(self, item):
+        self.add(item)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def discard(self, item):
+        if not item in self._items:
+            return False
+        del self._items[item]
+        return True
+
+    def remove(self, item):
+        if not self.discard(item):
+            raise KeyError(item)
+
+    def clear(self):
+        self._items.clear()
+
+    def to_list(self):
+        return list(self)
+
+
+class PagesIndex(OrderedSet):
+    """Art pages are stored as deviation id -> (interned head, slug), any
+    other page is kept as a plain string entry."""
+
+    def __init__(self, items=None):
+        self.__lower = dict()
+        self.__ids = dict()
+        super().__init__(items)
+
+    def __contains__(self, item):
+        parts = split_page(item, intern=False)
+        if not parts is None and self._items.get(parts[2]) == parts[:2]:
+            return True
+        return item in self._items
+
+    def __iter__(self):
+        return (join_page(*v, k) if v else k for k, v in self._items.items())
+
+    def __reversed__(self):
+        return (join_page(*v, k) if v else k for k, v in reversed(self._items.items()))
+
+    def add(self, item):
+        if item in self:
+            return False
+        parts = split_page(item)
+        if not parts is None and not parts[2] in self._items:
+            head, slug, dev_id = parts
+            self._items[dev_id] = (head, slug)
+            return True
+        self._items[item] = None
+        lower = item.lower()
+        self.__lower[lower] = self.__lower.get(lower, 0) + 1
+        dev_id = deviation_id(item)
+        if not dev_id is None:
+            self.__ids[dev_id] = self.__ids.get(dev_id, 0) + 1
+        return True
+
+    def discard(self, item):
+        parts = split_page(item, intern=False)
+        if not parts is None and self._items.get(parts[2]) == parts[:2]:
+            del self._items[parts[2]]
+            return True
+        if not super().discard(item):
+            return False
+        lower = item.lower()
+        count = self.__lower.get(lower, 0) - 1
+        if count > 0:
+            self.__lower[lower] = count
+        else:
+            self.__lower.pop(lower, None)
+        dev_id = deviation_id(item)
+        if not dev_id is None:
+            count = self.__ids.get(dev_id, 0) - 1
+            if count > 0:
+                self.__ids[dev_id] = count
+            else:
+                self.__ids.pop(dev_id, None)
+        return True
+
+    def clear(self):
+        super().clear()
+        self.__lower.clear()
+        self.__ids.clear()
+
+    def contains_lower(self, item):
+        lower = item.lower()
+        if lower in self.__lower:
+            return True
+        parts = split_page(lower, intern=False)
+        if parts is None:
+            return False
+        entry = self._items.get(parts[2])
+        return bool(entry) and join_page(*entry, parts[2]).lower() == lower
+
+    def lower_keys(self):
+        return (p.lower() for p in self)
+
+    def contains_id(self, dev_id):
+        return dev_id in self._items or dev_id in self.__ids
+
+    def get_id(self, dev_id):
+        entry = self._items.get(dev_id)
+        if not entry:
+            return None
+        return join_page(*entry, dev_id)
+
+
+class FilenamesIndex(OrderedSet):
+    def __init__(self, items=None, exclude=None):
+        self.__exclude = exclude
+        self.__excluded = set()
+        self.__by_stem = dict()
+        self.__by_id = dict()
+        super().__init__(items)
+
+    def __copy__(self):
+        return self.__class__(self, exclude=self.__exclude)
+
+    @staticmethod
+    def stem_key(fname):
+        stem, _sep, _ext = fname.rpartition('.')
+        return (stem or fname).lower()
+
+    @staticmethod
+    def id_key(fname):
+        stem, _sep, _ext = fname.rpartition('.')
+        return deviation_id(stem or fname)
+
+    def add(self, item):
+        if not super().add(item):
+            return False
+        if self.__exclude is not None and self.__exclude(item):
+            self.__excluded.add(item)
+        else:
+            # Every name is kept per key in insertion order, the first one is
+            # returned by lookups and removals don't need a rescan
+            self.__by_stem.setdefault(self.stem_key(item), dict())[item] = None
+            dev_id = self.id_key(item)
+            if not dev_id is None:
+                self.__by_id.setdefault(dev_id, dict())[item] = None
+        return True
+
+    def discard(self, item):
+        if not super().discard(item):
+            return False
+        if item in self.__excluded:
+            self.__excluded.discard(item)
+            return True
+        self.__unindex(self.__by_stem, self.stem_key(item), item)
+        self.__unindex(self.__by_id, self.id_key(item), item)
+        return True
+
+    @staticmethod
+    def __unindex(index, key, item):
+        names = index.get(key)
+        if names is None:
+            return
+        names.pop(item, None)
+        if not names:
+            del index[key]
+
+    def clear(self):
+        super().clear()
+        self.__excluded.clear()
+        self.__by_stem.clear()
+        self.__by_id.clear()
+
+    def is_visible(self, item):
+        return item in self and not item in self.__excluded
+
+    def visible(self):
+        return (fn for fn in self if not fn in self.__excluded)
+
+    def lookup(self, shortname):
+        return next(iter(self.__by_stem.get(shortname.lower(), ())), None)
+
+    def lookup_id(self, dev_id):
+        return next(iter(self.__by_id.get(dev_id, ())), None)
+
+
+class ArtistsIndex():
+    def __init__(self, artists=None):
+        # Artist entries may be shared with the cache files LRU, they are
+        # copied before their first change
+        self.__artists = dict(artists) if artists is not None else {}
+        self.__owned = set()
+        self.__pages_by_fn = dict()
+        for artist in self.__artists.values():
+            self.__pages_by_fn.update(artist.get('Artworks', {}))
+
+    def __contains__(self, artist_name):
+        return artist_name in self.__artists
+
+    def __getitem__(self, artist_name):
+        return self.__artists[artist_name]
+
+    def __iter__(self):
+        return iter(self.__artists)
+
+    def __len__(self):
+        return len(self.__artists)
+
+    def get(self, artist_name, default=None):
+        return self.__artists.get(artist_name, default)
+
+    def items(self):
+        return self.__artists.items()
+
+    def add(self, artist_name, home_page, fname, page):
+        artist = self.__artists.get(artist_name)
+        if artist is None:
+            artist = {'Home Page': home_page, 'Artworks': {}}
+            self.__artists[artist_name] = artist
+            self.__owned.add(artist_name)
+        elif artist['Artworks'].get(fname) == page:
+            return False
+        elif not artist_name in self.__owned:
+            artist = dict(artist, Artworks=dict(artist['Artworks']))
+            self.__artists[artist_name] = artist
+            self.__owned.add(artist_name)
+        artist['Artworks'][fname] = page
+        self.__pages_by_fn[fname] = page
+        return True
+
+    def page_for(self, fname):
+        return self.__pages_by_fn.get(fname)
+
+    def to_dict(self):
+        return self.__artists
@@ -0,0 +1,97 @@
+import json
+import logging
+from json import JSONDecodeError
+
+logger = logging.getLogger(__name__)
+
+
+def apply_set_op(contents, op, item):
+    if op == '+':
+        contents.add(item)
+    elif op == '-':
+        contents.discard(item)
+    else:
+        raise ValueError(f"Unknown journal op: {op}")
+
+
+def apply_artists_op(contents, op, *args):
+    if op == '+':
+        contents.add(*args)
+    else:
+        raise ValueError(f"Unknown journal op: {op}")
+
+
+class DAGRCacheJournal():
+    def __init__(self, cache_io, cache_name, compact_threshold=None, enabled=True):
+        self.__cache_io = cache_io
+        self.__cache_name = cache_name
+        self.__journal_name = f"{cache_name}.journal"
+        self.__compact_threshold = compact_threshold
+        self.__enabled = enabled
+        self.__pending = []
+        self.__entries = 0
+
+    @property
+    def cache_name(self):
+        return self.__cache_name
+
+    @property
+    def journal_name(self):
+        return self.__journal_name
+
+    @property
+    def enabled(self):
+        return self.__enabled
+
+    @property
+    def entries(self):
+        return self.__entries + len(self.__pending)
+
+    def replay(self, contents, apply_op=apply_set_op):
+        replayed = 0
+        for line_no, line in enumerate(self.__cache_io.read_lines(self.__journal_name), start=1):
+            if not line.strip():
+                continue
+            try:
+                op, *args = json.loads(line)
+            except (JSONDecodeError, ValueError):
+                logger.warning(
+                    'Skipping bad %s journal entry at line %s', self.__cache_name, line_no)
+                continue
+            apply_op(contents, op, *args)
+            replayed += 1
+        self.__entries = replayed
+        if replayed > 0:
+            logger.log(
+                level=15, msg=f"Replayed {replayed} {self.__cache_name} journal entries")
+        return contents
+
+    def record(self, op, *args):
+        if self.__enabled:
+            self.__pending.append([op, *args])
+
+    def needs_compact(self):
+        if not self.__enabled:
+            # A journal left over from an earlier run is only drained
+            return True
+        if not self.__compact_threshold:
+            return False
+        return self.entries >= self.__compact_threshold
+
+    def flush(self):
+        if not self.__pending:
+            return 0
+        pending = self.__pending
+        self.__cache_io.append_lines(
+            self.__journal_name, [json.dumps(e) for e in pending])
+        self.__pending = []
+        self.__entries += len(pending)
+        logger.log(
+            level=15, msg=f"Appended {len(pending)} entries to {self.__journal_name}")
+        return len(pending)
+
+    def reset(self):
+        self.__pending = []
+        if self.__entries > 0 or (self.__enabled and self.__cache_io.exists(self.__journal_name, update_cache=False)):
+            self.__cache_io.write('', fname=self.__journal_name)
+        self.__entries = 0
@@ -0,0 +1,215 @@
+import logging
+
+from .DAGRCacheJournal import DAGRCacheJournal
+from .DAGRIo import DAGRIo
+from .exceptions import DagrCacheLockException
+from .utils import sleep
+
+logger = logging.getLogger(__name__)
+
+LOCK_ATTEMPTS = 10
+LOCK_WAIT = 0.5
+
+
+def apply_deviations_op(contents, op, *args):
+    if op == '+':
+        contents.add(*args)
+    elif op == '-':
+        contents.discard(*args)
+    else:
+        raise ValueError(f"Unknown journal op: {op}")
+
+
+class DeviationsMapping():
+    def __init__(self, deviations=None):
+        self.__deviations = deviations if deviations is not None else {}
+        self.__by_dir = dict()
+        for dev_key, entries in self.__deviations.items():
+            for rel_dir, _fname, _page in entries:
+                self.__by_dir.setdefault(rel_dir, set()).add(dev_key)
+
+    def __len__(self):
+        return len(self.__deviations)
+
+    def items(self):
+        return self.__deviations.items()
+
+    def get(self, dev_id):
+        return self.__deviations.get(str(dev_id), [])
+
+    def add(self, dev_id, rel_dir, fname, page):
+        dev_key = str(dev_id)
+        entries = self.__deviations.setdefault(dev_key, [])
+        entry = [rel_dir, fname, page]
+        for idx, existing in enumerate(entries):
+            if existing[0] == rel_dir:
+                if existing == entry:
+                    return False
+                entries[idx] = entry
+                return True
+        entries.append(entry)
+        self.__by_dir.setdefault(rel_dir, set()).add(dev_key)
+        return True
+
+    def discard(self, dev_id, rel_dir):
+        dev_key = str(dev_id)
+        entries = self.__deviations.get(dev_key)
+        if not entries:
+            return False
+        remaining = [e for e in entries if not e[0] == rel_dir]
+        if len(remaining) == len(entries):
+            return False
+        if remaining:
+            self.__deviations[dev_key] = remaining
+        else:
+            del self.__deviations[dev_key]
+        dir_keys = self.__by_dir.get(rel_dir)
+        if dir_keys is not None:
+            dir_keys.discard(dev_key)
+            if not dir_keys:
+                del self.__by_dir[rel_dir]
+        return True
+
+    def dir_ids(self, rel_dir):
+        return list(self.__by_dir.get(rel_dir, ()))
+
+    def to_dict(self):
+        return self.__deviations
+
+
+class DAGRDeviationIndex():
+    @staticmethod
+    def create(config, dagr_io=None):
+        index_io = (dagr_io if dagr_io is not None else DAGRIo).create(
+            config.output_dir, '', config)
+        return DAGRDeviationIndex(config, index_io)
+
+    def __init__(self, config, index_io):
+        self.__config = config
+        self.__index_io = index_io
+        self.__index_name = config.get(
+            'dagr.cache', 'deviations') or '.deviations'
+        serializers = config.get(
+            'dagr.cache.serializers', key_errors=False) or {}
+        self.__serializer = serializers.get(
+            'deviations', serializers.get('default', 'json'))
+        self.__journal = None
+        if index_io.supports_journal:
+            self.__journal = DAGRCacheJournal(
+                index_io, self.__index_name,
+                config.get('dagr.cache', 'journalcompactthreshold'))
+        self.__deviations = None
+        # Changes not yet saved when there is no journal
+        self.__unsaved = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if not self.__index_io is None:
+            self.__index_io.close()
+            self.__index_io = None
+            self.__deviations = None
+
+    @property
+    def index_name(self):
+        return self.__index_name
+
+    @property
+    def deviations(self):
+        if self.__deviations is None:
+            self.__deviations = self.__load()
+        return self.__deviations
+
+    def __file_names(self):
+        names = [self.__index_name]
+        if not self.__journal is None:
+            names.append(self.__journal.journal_name)
+        return [n for n in names if self.__index_io.exists(n, update_cache=False)]
+
+    def exists(self):
+        # Entries may only be in the journal until the first compaction
+        return len(self.__file_names()) > 0
+
+    def mtime(self):
+        # Time of the last change to the snapshot or its journal
+        mtimes = [self.__index_io.stat(n)['st_mtime']
+                  for n in self.__file_names()]
+        return max(mtimes) if mtimes else None
+
+    def __load(self):
+        logger.log(level=15, msg='Loading deviations index')
+        contents = {}
+        if self.__index_io.exists(self.__index_name, update_cache=False):
+            contents = self.__index_io.load_json(self.__index_name)
+        deviations = DeviationsMapping(contents)
+        if not self.__journal is None:
+            self.__journal.replay(deviations, apply_deviations_op)
+        return deviations
+
+    def lookup(self, dev_id):
+        return self.deviations.get(dev_id)
+
+    def duplicates(self):
+        return {k: v for k, v in self.deviations.items() if len(v) > 1}
+
+    def __record(self, op, *args):
+        if self.__journal is None:
+            self.__unsaved.append([op, *args])
+        else:
+            self.__journal.record(op, *args)
+
+    def add(self, dev_id, rel_dir, fname, page):
+        # Callers only send entries new to their folder, the index is not
+        # loaded just to check for them
+        if not self.__deviations is None and not self.__deviations.add(dev_id, rel_dir, fname, page):
+            return False
+        self.__record('+', dev_id, rel_dir, fname, page)
+        return True
+
+    def remove_dir(self, rel_dir):
+        removed = 0
+        for dev_key in self.deviations.dir_ids(rel_dir):
+            if self.__deviations.discard(dev_key, rel_dir):
+                removed += 1
+                self.__record('-', dev_key, rel_dir)
+        return removed
+
+    def __lock(self):
+        # Compaction by another process only takes a moment
+        for _attempt in range(LOCK_ATTEMPTS):
+            try:
+                self.__index_io.lock()
+                return True
+            except DagrCacheLockException:
+                sleep(LOCK_WAIT)
+        logger.warning('Deviations index is locked, deferring save')
+        return False
+
+    def save(self, compact=False):
+        if self.__journal is None and not (compact or self.__unsaved):
+            return True
+        # Other processes append to and compact the same index, so changes
+        # are only written under the lock, on top of a fresh read
+        if not self.__lock():
+            return False
+        try:
+            if not self.__journal is None:
+                self.__journal.flush()
+                if not (compact or self.__journal.needs_compact()):
+                    return True
+            deviations = self.__load()
+            for op in self.__unsaved:
+                apply_deviations_op(deviations, *op)
+            self.__index_io.save_json(
+                self.__index_name, deviations.to_dict(), serializer=self.__serializer)
+            if not self.__journal is None:
+                self.__journal.reset()
+            self.__unsaved = []
+            self.__deviations = deviations
+        finally:
+            self.__index_io.release_lock()
+        return True
@@ -2,15 +2,14 @@ import logging
 import random
 import string
 from email.utils import parsedate
-from json import JSONDecodeError
 from os import scandir, utime
 from pathlib import Path, PurePath, PurePosixPath
 from time import mktime
 
 import portalocker
 
-from .exceptions import DagrCacheLockException
-from .utils import load_json, save_json, unlink_lockfile
+from .exceptions import DagrCacheLockException, DagrIncompleteDownload
+from .utils import iter_chunks, load_json, save_json, unlink_lockfile
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +76,18 @@ class DAGRIo():
     def rel_dir_name(self):
         return self.__rel_dir_name
 
+    @ property
+    def supports_journal(self):
+        return True
+
+    @ property
+    def supports_resume(self):
+        return True
+
+    @ property
+    def supports_serializers(self):
+        return True
+
     def __enter__(self):
         return self
 
@@ -90,12 +101,16 @@ class DAGRIo():
     def load_json(self, fname, log_errors=None):
         return load_json(self.__base_dir.joinpath(fname))
 
-    def save_json(self, fname, content, do_backup=True, log_errors=None):
-        return save_json(self.__base_dir.joinpath(fname), content, do_backup=do_backup)
+    def save_json(self, fname, content, do_backup=True, log_errors=None, serializer=None):
+        return save_json(self.__base_dir.joinpath(fname), content, do_backup=do_backup, serializer=serializer)
 
     def exists(self, fname=None, dest=None, subdir=None, update_cache=None):
         return self.__get_subpath(fname, dest, subdir).exists()
 
+    def exists_many(self, fnames):
+        # One directory listing instead of a stat per file
+        return set(fnames).intersection(self.list_dir())
+
     def replace(self, dest_fname=None, src_fname=None, dest=None, src=None, dest_subdir=None, src_subdir=None):
         return self.__get_subpath(dest_fname, dest, dest_subdir).replace(
             self.__get_subpath(src_fname, src, src_subdir))
@@ -110,7 +125,7 @@ class DAGRIo():
         if self.exists(fname, update_cache=False):
             try:
                 return self.load_json(fname)
-            except JSONDecodeError:
+            except ValueError:
                 logger.warning(
                     f"Unable to decode primary {fname} cache:", exc_info=True)
                 self.replace(fname, fpath.with_suffix('.bad').name)
@@ -134,6 +149,24 @@ class DAGRIo():
     def update_fn_cache(self, fname):
         pass
 
+    def read_lines(self, fname):
+        fpath = self.__base_dir.joinpath(fname)
+        if not fpath.exists():
+            return []
+        return fpath.read_text().splitlines()
+
+    def append_lines(self, fname, lines):
+        fpath = self.__base_dir.joinpath(fname)
+        prefix = ''
+        if fpath.exists() and fpath.stat().st_size > 0:
+            with fpath.open('rb') as f:
+                f.seek(-1, 2)
+                if f.read(1) != b'\n':
+                    # Terminate a partially written entry
+                    prefix = '\n'
+        with fpath.open('a') as f:
+            return f.write(prefix + ''.join(f"{l}\n" for l in lines))
+
     def write(self, content, fname=None, dest=None, subdir=None):
         written = None
         dest = self.__get_subpath(fname, dest, subdir)
@@ -146,17 +179,78 @@ class DAGRIo():
         logger.log(level=4, msg='Finished writing')
         return written
 
-    def write_bytes(self, content, fname=None, dest=None, subdir=None):
+    def write_bytes(self, content, fname=None, dest=None, subdir=None, offset=0, expected_size=None, validators=None):
         written = None
         dest = self.__get_subpath(fname, dest, subdir)
         tmp = dest.with_suffix('.tmp')
+        meta = tmp.with_name(f"{tmp.name}.meta")
         logger.log(level=5, msg=f"Writing item to {dest}")
-        written = tmp.write_bytes(content)
+        if validators and not expected_size is None:
+            save_json(meta, dict(validators, size=expected_size), do_backup=False)
+        if offset:
+            logger.log(level=15, msg=f"Resuming {tmp} at byte {offset}")
+            written = offset
+            try:
+                fh = tmp.open('r+b')
+            except FileNotFoundError:
+                fh = None
+            # The partial changed after partial_info, content starts at
+            # offset so the caller has to download again from the start
+            if fh is None or fh.seek(0, 2) < offset:
+                if not fh is None:
+                    fh.close()
+                self.__discard_partial(tmp, meta)
+                raise DagrIncompleteDownload(expected_size, 0)
+            with fh:
+                fh.seek(offset)
+                fh.truncate()
+                for chunk in iter_chunks(content):
+                    written += fh.write(chunk)
+        elif isinstance(content, (bytes, bytearray)):
+            written = tmp.write_bytes(content)
+        else:
+            written = 0
+            with tmp.open('wb') as fh:
+                for chunk in iter_chunks(content):
+                    written += fh.write(chunk)
+        if not (expected_size is None or written == expected_size):
+            if written > expected_size:
+                self.__discard_partial(tmp, meta)
+            raise DagrIncompleteDownload(expected_size, written)
         logger.log(level=4, msg='Renaming temp file')
         tmp.rename(dest)
+        if meta.exists():
+            meta.unlink()
         logger.log(level=4, msg='Finished writing')
         return written
 
+    def partial_info(self, fname=None, dest=None, subdir=None):
+        tmp = self.__get_subpath(fname, dest, subdir).with_suffix('.tmp')
+        meta = tmp.with_name(f"{tmp.name}.meta")
+        if not (tmp.exists() and meta.exists()):
+            return None
+        try:
+            info = load_json(meta)
+        except Exception:
+            logger.warning('Unable to load partial download info %s', meta, exc_info=True)
+            self.__discard_partial(tmp, meta)
+            return None
+        info['received'] = tmp.stat().st_size
+        if not 0 < info['received'] < info.get('size', 0):
+            self.__discard_partial(tmp, meta)
+            return None
+        return info
+
+    def discard_partial(self, fname=None, dest=None, subdir=None):
+        tmp = self.__get_subpath(fname, dest, subdir).with_suffix('.tmp')
+        self.__discard_partial(tmp, tmp.with_name(f"{tmp.name}.meta"))
+
+    def __discard_partial(self, tmp, meta):
+        logger.log(level=15, msg=f"Discarding partial download {tmp}")
+        for fpath in (tmp, meta):
+            if fpath.exists():
+                fpath.unlink()
+
     def utime(self, mtime, fname=None, dest=None, subdir=None):
         mod_time = mktime(parsedate(mtime))
         logger.log(level=4, msg=f"Updating file times to {mod_time}")
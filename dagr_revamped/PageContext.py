@@ -0,0 +1,68 @@
+import logging
+
+from .exceptions import DagrException
+from .utils import StatefulBrowser
+
+try:
+    from calmjs.parse import es5 as calmjs_es5
+except ModuleNotFoundError:
+    calmjs_es5 = None
+
+logger = logging.getLogger(__name__)
+
+
+class PageContext():
+    def __init__(self, url, content, soup_loader, session=None):
+        self.__url = url
+        self.__content = content
+        self.__soup_loader = soup_loader
+        self.__session = session
+        self.__soup = None
+        self.__scripts = None
+        self.__script_asts = {}
+        self.__browser = None
+
+    @property
+    def url(self):
+        return self.__url
+
+    @property
+    def content(self):
+        return self.__content
+
+    @property
+    def soup(self):
+        if self.__soup is None:
+            self.__soup = self.__soup_loader()
+        return self.__soup
+
+    @property
+    def scripts(self):
+        if self.__scripts is None:
+            # get_text() leaves out script contents, string does not
+            self.__scripts = [content for content in
+                              (script.string for script in
+                               self.soup.find_all('script', {'type': 'text/javascript'})
+                               if not script.has_attr('src'))
+                              if content]
+        return self.__scripts
+
+    @property
+    def browser(self):
+        if self.__browser is None:
+            self.__browser = StatefulBrowser(session=self.__session)
+        if not self.__browser.get_url() == self.__url:
+            # Plugins may have navigated away from the page
+            logger.log(4, 'Opening page context browser')
+            self.__browser.open_fake_page(self.__content, self.__url)
+        return self.__browser
+
+    def find_script(self, filt):
+        return next((s for s in self.scripts if filt in s), None)
+
+    def script_ast(self, script):
+        if calmjs_es5 is None:
+            raise DagrException('Required package calmjs not available')
+        if not script in self.__script_asts:
+            self.__script_asts[script] = calmjs_es5(script)
+        return self.__script_asts[script]
@@ -0,0 +1,185 @@
+import logging
+import threading
+from time import monotonic
+
+from .utils import retry_after_seconds, sleep
+
+logger = logging.getLogger(__name__)
+
+RATE_CLASSES = ['page', 'media', 'resolve', 'crawl']
+
+# Pre Dagr.RateLimits options, still honoured when set
+LEGACY_OPTIONS = {
+    # The download delay used to pace every processed deviation
+    'page': ('dagr', 'downloaddelay'),
+    'media': ('dagr', 'downloaddelay'),
+    'resolve': ('dagr', 'resolveratelimit')
+}
+
+
+class TokenBucket():
+    def __init__(self, interval=0, capacity=1):
+        self.__interval = interval or 0
+        self.__capacity = max(capacity or 1, 1)
+        self.__tokens = self.__capacity
+        self.__updated = monotonic()
+        self.__lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return self.__interval
+
+    def reserve(self, min_interval=0):
+        # Takes a token, returns how long the caller must wait before using it.
+        # Time spent between requests is credited up to the bucket capacity.
+        interval = max(self.__interval, min_interval)
+        with self.__lock:
+            now = monotonic()
+            if interval > 0:
+                self.__tokens = min(
+                    self.__capacity, self.__tokens + (now - self.__updated) / interval)
+            self.__updated = now
+            if not interval > 0:
+                return 0
+            self.__tokens -= 1
+            if self.__tokens >= 0:
+                return 0
+            return -self.__tokens * interval
+
+
+class AdaptivePacer():
+    # AIMD pacing: the shared minimum interval grows multiplicatively on
+    # throttling responses and shrinks additively on sustained success
+    def __init__(self, throttle_codes=None, backoff=2.0, initial=1.0, max_interval=300,
+                 recover_after=10, recover_step=0.5):
+        self.__throttle_codes = set(throttle_codes or [])
+        self.__backoff = max(backoff, 1)
+        self.__initial = initial
+        self.__max_interval = max_interval
+        self.__recover_after = max(recover_after, 1)
+        self.__recover_step = recover_step
+        self.__interval = 0
+        self.__hold_until = 0
+        self.__last_backoff = None
+        self.__successes = 0
+        self.__throttled = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return self.__interval
+
+    @property
+    def throttled(self):
+        return self.__throttled
+
+    @property
+    def throttle_codes(self):
+        return self.__throttle_codes
+
+    def hold(self):
+        return max(self.__hold_until - monotonic(), 0)
+
+    def is_throttle(self, status_code):
+        return status_code in self.__throttle_codes
+
+    def feedback(self, status_code, headers=None):
+        if not self.is_throttle(status_code):
+            with self.__lock:
+                self.__successes += 1
+                if self.__interval > 0 and self.__successes >= self.__recover_after:
+                    self.__successes = 0
+                    self.__interval = max(
+                        self.__interval - self.__recover_step, 0)
+                    logger.log(15, 'Pacing interval decreased to %.4f seconds',
+                               self.__interval)
+            return False
+        retry_after = retry_after_seconds(
+            (headers or {}).get('Retry-After'))
+        with self.__lock:
+            now = monotonic()
+            self.__successes = 0
+            self.__throttled += 1
+            if not retry_after is None:
+                self.__hold_until = max(self.__hold_until, now + retry_after)
+            # Concurrent requests throttled together only back off once
+            if self.__last_backoff is None or now - self.__last_backoff >= max(self.__interval, 1):
+                self.__last_backoff = now
+                self.__interval = min(
+                    max(self.__interval * self.__backoff, self.__initial), self.__max_interval)
+                logger.warning('Throttled (%s), pacing interval increased to %.4f seconds',
+                               status_code, self.__interval)
+        return True
+
+
+class RateLimiter():
+    @staticmethod
+    def create(config):
+        intervals = {}
+        for rate_class in RATE_CLASSES:
+            interval = config.get('dagr.ratelimits', rate_class)
+            if rate_class in LEGACY_OPTIONS:
+                legacy = config.get(*LEGACY_OPTIONS[rate_class])
+                if not legacy is None:
+                    logger.warning('%s %s is deprecated, use dagr.ratelimits %s',
+                                   *LEGACY_OPTIONS[rate_class], rate_class)
+                    interval = legacy
+            intervals[rate_class] = interval
+        throttle_codes = [int(c) for c in str(config.get(
+            'dagr.ratelimits', 'throttlecodes') or '').split(',') if c.strip()]
+        pacer = AdaptivePacer(
+            throttle_codes,
+            backoff=config.get('dagr.ratelimits', 'backoff'),
+            initial=config.get('dagr.ratelimits', 'backoffinitial'),
+            max_interval=config.get('dagr.ratelimits', 'backoffmax'),
+            recover_after=config.get('dagr.ratelimits', 'recoverafter'),
+            recover_step=config.get('dagr.ratelimits', 'recoverstep'))
+        return RateLimiter(intervals, config.get('dagr.ratelimits', 'burst'), pacer)
+
+    def __init__(self, intervals=None, burst=1, pacer=None):
+        self.__burst = burst
+        self.__pacer = pacer or AdaptivePacer()
+        self.__lock = threading.Lock()
+        self.__buckets = {k: TokenBucket(v, burst)
+                          for k, v in (intervals or {}).items()}
+
+    @property
+    def pacer(self):
+        return self.__pacer
+
+    def bucket(self, rate_class, interval=None):
+        # Classes that are not configured are created on first use
+        with self.__lock:
+            if not rate_class in self.__buckets:
+                self.__buckets[rate_class] = TokenBucket(
+                    interval, self.__burst)
+            return self.__buckets[rate_class]
+
+    def intervals(self):
+        with self.__lock:
+            return {k: max(v.interval, self.__pacer.interval) for k, v in self.__buckets.items()}
+
+    def rates(self):
+        # Requests per second for each class, 0 is unlimited
+        return {k: round(1 / v, 4) if v > 0 else 0 for k, v in self.intervals().items()}
+
+    def reserve(self, rate_class):
+        delay = self.bucket(rate_class).reserve(self.__pacer.interval)
+        return max(delay, self.__pacer.hold())
+
+    def wait(self, rate_class):
+        delay = self.reserve(rate_class)
+        if delay > 0:
+            logger.log(15, 'Need to sleep for %.4f seconds (%s)',
+                       delay, rate_class)
+            sleep(delay)
+        return delay
+
+    def backoff_delay(self):
+        return max(self.__pacer.interval, self.__pacer.hold())
+
+    def feedback(self, status_code, headers=None):
+        return self.__pacer.feedback(status_code, headers)
+
+    def response_hook(self, response, *args, **kwargs):
+        self.feedback(response.status_code, response.headers)
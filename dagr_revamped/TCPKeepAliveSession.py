@@ -123,24 +123,22 @@ class TCPKeepAliveHttpAdapter(HTTPAdapter):
 
 
 class TCPKeepAliveSession(Session):
-    def __init__(self, max_poolsize=100, total_retries=5):
+    def __init__(self, max_poolsize=100, total_retries=5, backoff_factor=0.5):
         super().__init__()
-        self.mount('https://', TCPKeepAliveHttpAdapter(
-            max_retries=Retry(
-                total=total_retries,
-                backoff_factor=0.5,
-                status_forcelist=[500, 502, 504]
-            ),
-            pool_connections=max_poolsize,
-            pool_maxsize=max_poolsize
-        ))
-
-        self.mount('http://', TCPKeepAliveHttpAdapter(
-            max_retries=Retry(
-                total=5,
-                backoff_factor=0.5,
-                status_forcelist=[500, 502, 504]
-            ),
-            pool_connections=max_poolsize,
-            pool_maxsize=max_poolsize
-        ))
+        for prefix in ['https://', 'http://']:
+            self.mount(prefix, TCPKeepAliveHttpAdapter(
+                max_retries=Retry(
+                    total=total_retries,
+                    backoff_factor=backoff_factor,
+                    status_forcelist=[500, 502, 504]
+                ),
+                pool_connections=max_poolsize,
+                pool_maxsize=max_poolsize
+            ))
+
+    @property
+    def retry_statuses(self):
+        statuses = set()
+        for adapter in self.adapters.values():
+            statuses.update(adapter.max_retries.status_forcelist or [])
+        return statuses
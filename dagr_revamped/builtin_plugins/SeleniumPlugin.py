@@ -80,7 +80,7 @@ class SeleniumPlugin():
             if self.__cache is None:
                 raise Exception('Cannot init crawler before cache')
             self.__crawler = Crawler(
-                self.__app_config, self.__config, self.__browser, self.__cache)
+                self.__app_config, self.__config, self.__browser, self.__cache, self.__manager.rate_limiter)
         return self.__crawler
 
     def shutdown(self):
@@ -5,8 +5,10 @@ from pprint import pformat
 
 from dagr_revamped.DAGRIo import (DAGRIo, get_dir_name, get_fname,
                                   get_new_dir_name)
+from dagr_revamped.exceptions import DagrException
 from dagr_revamped.TCPKeepAliveSession import TCPKeepAliveSession
-from dagr_revamped.utils import (http_exists, http_fetch_json, http_list_dir,
+from dagr_revamped.utils import (http_exists, http_exists_many,
+                                 http_fetch_json, http_list_dir,
                                  http_lock_dir, http_mkdir,
                                  http_post_file_json, http_post_file_multipart,
                                  http_post_json, http_post_raw,
@@ -16,6 +18,12 @@ from dagr_revamped.utils import (http_exists, http_fetch_json, http_list_dir,
 logger = logging.getLogger(__name__)
 
 
+def reject_serializer(serializer):
+    # The save json endpoint always stores json
+    raise DagrException(
+        f"Serializer {serializer} not supported by http io")
+
+
 class DAGRHTTPIo(DAGRIo):
     @staticmethod
     def create(base_dir, rel_dir, config):
@@ -42,6 +50,7 @@ class DAGRHTTPIo(DAGRIo):
         logger.log(level=5, msg=f"HTTP io endpoints: {pformat(endpoints)}")
 
         self.__exists_ep = endpoints.get('exists', None)
+        self.__exists_many_ep = endpoints.get('exists_many', None)
         self.__list_dir_ep = endpoints.get('list_dir', None)
         self.__load_json_ep = endpoints.get('load_json', None)
         self.__save_json_ep = endpoints.get('save_json', None)
@@ -54,6 +63,8 @@ class DAGRHTTPIo(DAGRIo):
         self.__rename_dir_ep = endpoints.get('rename_dir', None)
         self.__file_stat_ep = endpoints.get('file_stat', None)
         self.__dir_lock_ep = endpoints.get('dir_lock', None)
+        self.__read_lines_ep = endpoints.get('read_lines', None)
+        self.__append_lines_ep = endpoints.get('append_lines', None)
         self.__session = TCPKeepAliveSession()
 
         if self.__exists_ep is None:
@@ -68,6 +79,12 @@ class DAGRHTTPIo(DAGRIo):
             self.list_dir = lambda: http_list_dir(
                 self.__session, self.__list_dir_ep, self.rel_dir_name)
 
+        if self.__exists_many_ep is None:
+            logger.log(level=15, msg='No exists many endpoint configured, using list dir')
+        else:
+            self.exists_many = lambda fnames: http_exists_many(
+                self.__session, self.__exists_many_ep, dir_path=self.rel_dir_name, itemnames=list(fnames))
+
         if self.__load_json_ep is None:
             logger.warning('No load json endpoint configured')
         else:
@@ -77,8 +94,8 @@ class DAGRHTTPIo(DAGRIo):
         if self.__save_json_ep is None:
             logger.warning('No save json endpoint configured')
         else:
-            self.save_json = lambda fname, content, do_backup=True, log_errors=True: http_post_file_json(
-                self.__session, self.__save_json_ep, self.rel_dir_name, fname, content, do_backup, log_errors=log_errors)
+            self.save_json = lambda fname, content, do_backup=True, log_errors=True, serializer=None: http_post_file_json(
+                self.__session, self.__save_json_ep, self.rel_dir_name, fname, content, do_backup, log_errors=log_errors) if serializer in (None, 'json') else reject_serializer(serializer)
 
         if self.__replace_ep is None:
             logger.warning('No replace endpoint configured')
@@ -137,6 +154,26 @@ class DAGRHTTPIo(DAGRIo):
             self.lock = lambda : http_lock_dir(self.__session, self.__dir_lock_ep, dir_path=self.rel_dir_name)
             self.release_lock = lambda : http_release_lock(self.__session, self.__dir_lock_ep, dir_path=self.rel_dir_name)
 
+        if self.__read_lines_ep is None or self.__append_lines_ep is None:
+            logger.log(level=15, msg='No journal endpoints configured')
+        else:
+            self.read_lines = lambda fname: http_fetch_json(
+                self.__session, self.__read_lines_ep, path=self.rel_dir_name, filename=fname)
+            self.append_lines = lambda fname, lines: http_post_json(
+                self.__session, self.__append_lines_ep, path=self.rel_dir_name, filename=fname, lines=lines)
+
+    @property
+    def supports_journal(self):
+        return not (self.__read_lines_ep is None or self.__append_lines_ep is None)
+
+    @property
+    def supports_resume(self):
+        return False
+
+    @property
+    def supports_serializers(self):
+        return False
+
     def close(self):
         self.exists = None
         self.list_dir = None
@@ -152,6 +189,8 @@ class DAGRHTTPIo(DAGRIo):
         self.rename_dir = None
         self.stat = None
         self.lock = None
+        self.read_lines = None
+        self.append_lines = None
 
         if self.__session:
             self.__session.close()
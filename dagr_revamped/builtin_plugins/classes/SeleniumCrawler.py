@@ -14,7 +14,7 @@ logger = logging.getLogger(__name__)
 
 
 class SeleniumCrawler():
-    def __init__(self, app_config, config, browser, cache):
+    def __init__(self, app_config, config, browser, cache, rate_limiter):
         self.__id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
         logger.debug('Created SeleniumCrawler %s', self.__id)
         self.__config = config
@@ -24,7 +24,9 @@ class SeleniumCrawler():
         self.__oom_max_pages = self.__config.get('oom_max_pages', 13000)
         self.__collect_mval_id = self.__config.get('collect_mval_id', True)
         self.__crawler_skip_count = self.__config.get('crawler_skip_count', 24)
-        self.__sleep_time = self.__config.get('page_sleep_time', 7)
+        self.__rate_limiter = rate_limiter
+        # Next page loads are paced by their own shared bucket
+        rate_limiter.bucket('selenium', self.__config.get('page_sleep_time', 7))
         logger.debug('OOM max pages set to %s', self.__oom_max_pages)
         logger.debug('Collect using mvalid elem set to %s',
                    self.__collect_mval_id)
@@ -139,7 +141,6 @@ collect_links(arguments[0])
             logger.log(15, 'Found next page element. Count: %s',
                        self.__page_count)
             self.__page_count += 1
-            crawl_st = time()
             collected = set()
             for _pd in range(1, 100):
                 collected.update(self.collect_pages_mval_id(
@@ -154,12 +155,7 @@ collect_links(arguments[0])
 
             pages.update(collected)
             self.update_history(slug, pages, history)
-            delay_needed = self.__sleep_time - (time() - crawl_st)
-
-            if delay_needed > 0:
-                logger.debug('Need to sleep for %.2f seconds', delay_needed)
-                sleep(delay_needed)
-
+            self.__rate_limiter.wait('selenium')
             self.click_next()
             return True
 
@@ -207,7 +203,7 @@ collect_links(arguments[0])
         self.__cache.flush(slug)
         return pages
 
-    def crawl(self, url_fmt, mode, deviant, mval=None, msg=None, full_crawl=False, crawl_offset=None, no_crawl=None, run_async=False):
+    def crawl(self, url_fmt, mode, deviant, mval=None, msg=None, full_crawl=False, crawl_offset=None, no_crawl=None, run_async=False, **kwargs):
         if not full_crawl:
             conf_fc = self.__config.get('full_crawl', '')
             if conf_fc is True or isinstance(conf_fc, str) and conf_fc.lower() == 'force':
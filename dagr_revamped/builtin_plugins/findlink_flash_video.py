@@ -2,16 +2,16 @@ import pickle
 
 
 def setup(manager):
-    manager.register_findlink_b('flash_video', find_flash_video)
+    manager.register_findlink_context('flash_video', find_flash_video)
     return True
 
 
-def find_flash_video(browser):
-    current_page = browser.get_current_page()
-    stage = current_page.find('div', {'data-hook': 'art_stage'})
+def find_flash_video(context):
+    stage = context.soup.find('div', {'data-hook': 'art_stage'})
     if stage:
         iframe_search = stage.find('iframe')
         if iframe_search:
+            browser = context.browser
             browser.open(iframe_search.attrs.get('src'))
             current_page = browser.get_current_page()
             embed_search = current_page.find('embed', {'id': 'sandboxembed'})
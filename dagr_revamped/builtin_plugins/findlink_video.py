@@ -14,29 +14,22 @@ from calmjs.parse.walkers import Walker as calmjs_walker
 
 
 def setup(manager):
-    manager.register_findlink('std_video', find_video)
+    manager.register_findlink_context('std_video', find_video)
     return True
 
 
-def find_video(current_page):
-    #current_page = pickle.loads(current_page)
+def find_video(context):
     try:
-        script = filter_page_scripts(current_page, 'deviantART.pageData=')
+        script = context.find_script('deviantART.pageData=')
+        if script is None:
+            return None
         best_res = extract_nested_assign(
-            script, ['deviantART.pageData', '"film"', '"sizes"'])[-1]
+            context.script_ast(script), ['deviantART.pageData', '"film"', '"sizes"'])[-1]
         return json.loads(str(extract_nested_assign(best_res, ['"src"'])))
     except StopIteration:
         pass
 
 
-def filter_page_scripts(current_page, filt):
-    return next(content for content in
-                (script.get_text() for script in
-                 current_page.find_all('script', {'type': 'text/javascript'})
-                    if not script.has_attr('src'))
-                if content and filt in content)
-
-
 def extract_nested_assign(node, identifiers):
     if not isinstance(node, calmjs_node):
         node = calmjs_es5(node)
@@ -1,10 +1,10 @@
 def setup(manager):
-    manager.register_findlink('eclipse_video', find_video)
+    manager.register_findlink_context('eclipse_video', find_video)
     return True
 
-def find_video(current_page):
-    screen_block = current_page.find('div', {'data-playable-hook': 'screen-block'})
+def find_video(context):
+    screen_block = context.soup.find('div', {'data-playable-hook': 'screen-block'})
     if screen_block:
         video = screen_block.find('video')
         if video:
-            return video.attrs.get('src')
\ No newline at end of file
+            return video.attrs.get('src')
@@ -2,6 +2,7 @@ import logging
 from docopt import docopt
 from datetime import datetime
 from pprint import pprint, pformat
+from .DAGRAsync import DAGRAsync
 from .lib import DAGR
 from .config import DAGRConfig
 from .version import version
@@ -38,6 +39,7 @@ Options:
     --useapi                                Use DA API
     --clientid=CLIENTID                     DA API Client ID
     --clientsecret=CLIENTSECRET             DA API Client Secret
+    --async                                 Use the asyncio engine (requires aiohttp).
     --config_options=CONFIGOPTIONS
     -h --help                               Display this screen.
     --version                               Display version.
@@ -81,7 +83,8 @@ Options:
             'useapi': arguments.get('--useapi'),
             'clientid': arguments.get('--clientid'),
             'clientsecret': arguments.get('--clientsecret'),
-            'config_options': arguments.get('--config_options')
+            'config_options': arguments.get('--config_options'),
+            'async': arguments.get('--async')
 
         }
 
@@ -95,7 +98,10 @@ def main():
     logger.log(level=5, msg=pformat(cli.arguments))
     logger.debug(pformat(cli.args))
     with DAGR(config=config, **cli.args) as ripper:
-        ripper.run()
+        if cli.args.get('async'):
+            DAGRAsync(ripper).run()
+        else:
+            ripper.run()
         ripper.print_errors()
         ripper.print_dl_total()
     if __name__ == '__main__':
@@ -5,6 +5,7 @@ from pprint import pformat, pprint
 from docopt import docopt
 
 from .config import DAGRConfig
+from .DAGRAsync import DAGRAsync
 from .dagr_logging import init_logging
 from .dagr_logging import log as dagr_log
 from .lib import DAGR
@@ -59,6 +60,7 @@ Options:
     --useapi                                Use DA API
     --clientid=CLIENTID                     DA API Client ID
     --clientsecret=CLIENTSECRET             DA API Client Secret
+    --async                                 Use the asyncio engine (requires aiohttp)
     --config_options=CONFIGOPTIONS
     -h --help                               Show this screen
     --version                               Show version
@@ -106,6 +108,7 @@ Options:
             'clientid': arguments.get('--clientid'),
             'clientsecret': arguments.get('--clientsecret'),
             'config_options': arguments.get('--config_options'),
+            'async': arguments.get('--async'),
             'log_level': ll_arg
         }
 
@@ -120,7 +123,10 @@ def main():
     logger.debug(pformat(cli.args))
 
     with DAGR(config=config, **cli.args) as ripper:
-        ripper.run()
+        if cli.args.get('async'):
+            DAGRAsync(ripper).run()
+        else:
+            ripper.run()
         ripper.print_errors()
         ripper.print_dl_total()
 
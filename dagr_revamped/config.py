@@ -200,6 +200,7 @@ class DAGRConfig(DAGRBaseConf):
             'MValArgs': 'album,collection,query,category,page,search,tag',
             'NDModes': 'search,tag',
             'MaxPages': 15000,
+            'IncrementalPages': 2,
             'Username': '',
             'Password': ''
         },
@@ -272,10 +273,28 @@ class DAGRConfig(DAGRBaseConf):
             'Reverse': False,
             # 'RecursionLimit': 10000,
             'SaveProgress': 50,
-            'DownloadDelay': 7.00,
-            'ResolveRateLimit': 10.00,
             'Verbose': False,
         },
+        'Dagr.RateLimits': {
+            'Page': 7.00,
+            'Media': 7.00,
+            'Resolve': 10.00,
+            'Crawl': 0,
+            'Burst': 1,
+            'ThrottleCodes': '429,500,502,503,504',
+            'Backoff': 2.0,
+            'BackoffInitial': 1.0,
+            'BackoffMax': 300,
+            'RecoverAfter': 10,
+            'RecoverStep': 0.5
+        },
+        'Dagr.Pipeline': {
+            'Workers': 1,
+            'CrawlPrefetch': 1
+        },
+        'Dagr.Async': {
+            'Concurrency': 4
+        },
         'Dagr.Bulk.Filenames': {
             'load': '.dagr_bulk.json,dagr_bulk.json',
             'save': '.dagr_bulk.json'
@@ -295,8 +314,18 @@ class DAGRConfig(DAGRBaseConf):
             'Queue': '.queue',
             'Premium': '.premium',
             'HTTPErrors': '.httperrors',
+            'Validators': '.validators',
+            'ConditionalCrawl': True,
             'ShortUrls': False,
-            'UpdateFilesList': True
+            'UpdateFilesList': True,
+            'Journal': False,
+            'JournalCompactThreshold': 5000,
+            'LRU_Dirs': 16,
+            'Deviations': '.deviations',
+            'DeviationIndex': False
+        },
+        'Dagr.Cache.Serializers': {
+            'Default': 'json'
         },
         'Dagr.Cache.Paths': {
             'Local': '~/.cache/dagr'
@@ -351,13 +380,15 @@ class DAGRConfig(DAGRBaseConf):
         'Dagr.Retry.ExceptionNames': {
             'OSError': True,
             'ChunkedEncodingError': True,
-            'ConnectionError': True
+            'ConnectionError': True,
+            'DagrIncompleteDownload': True
         },
         'Dagr.Verify': {
             'DebugLocation': ''
         },
         'Dagr.FindLink': {
             'DebugLocation': '',
+            'FastPath': True,
             'FallbackOrder': 'img full,meta,img normal'
         },
     })
@@ -371,7 +402,12 @@ class DAGRConfig(DAGRBaseConf):
         'Logging.Files.Levels': get_os_options('Logging.Files.Levels', ['Local', 'Remote']),
         'Logging.HTTP': get_os_options('Logging.HTTP', ['MaxConnectionRetries']),
         'Logging.HTTP.Hosts': get_os_section('Logging.HTTP.Hosts'),
-        'Dagr.Cache': get_os_options('Dagr.Cache', ['Fileslist_Preload_Threshold', 'Preload_HTTP_Endpoint']),
+        'Dagr.RateLimits': get_os_options('Dagr.RateLimits', [
+            'Page', 'Media', 'Resolve', 'Crawl', 'Burst', 'ThrottleCodes', 'Backoff', 'BackoffInitial', 'BackoffMax', 'RecoverAfter', 'RecoverStep'
+        ]),
+        'Dagr.Pipeline': get_os_options('Dagr.Pipeline', ['Workers', 'CrawlPrefetch']),
+        'Dagr.Async': get_os_options('Dagr.Async', ['Concurrency']),
+        'Dagr.Cache': get_os_options('Dagr.Cache', ['Fileslist_Preload_Threshold', 'Preload_HTTP_Endpoint', 'Journal', 'JournalCompactThreshold', 'LRU_Dirs', 'DeviationIndex', 'ConditionalCrawl']),
         'Dagr.DeviationProcessor': get_os_options('Dagr.DeviationProcessor', ['FNS_Address']),
         'Dagr.Logging':  get_os_options('Dagr.Logging', ['Level']),
         'Dagr.Plugins':get_os_options('Dagr.Plugins', ['Disabled']),
@@ -382,10 +418,10 @@ class DAGRConfig(DAGRBaseConf):
             'Unload_Cache_Policy', 'QueueMan_Fetch_Url', 'QueueMan_Enqueue_Url', 'Create_Driver_Policy', 'Crawl_Offset', 'Login_SS_Policy', 'Login_Dump_Policy'
         ]),
         'Dagr.Io.HTTP.Endpoints': get_os_options('Dagr.Io.HTTP.Endpoints', [
-            'Exists', 'Dir_Exists', 'List_Dir', 'Load_Json', 'Save_Json', 'Write_File', 'Utime',
-            'Replace', 'Mkdir', 'Rename_Dir', 'Dir_Lock', 'Update_FN_Cache'
+            'Exists', 'Exists_Many', 'Dir_Exists', 'List_Dir', 'Load_Json', 'Save_Json', 'Write_File', 'Utime',
+            'Replace', 'Mkdir', 'Rename_Dir', 'Dir_Lock', 'Update_FN_Cache', 'Read_Lines', 'Append_Lines'
         ]),
-        'DeviantArt': get_os_options('DeviantArt', ['Username', 'Password'])
+        'DeviantArt': get_os_options('DeviantArt', ['Username', 'Password', 'IncrementalPages'])
     })
     SETTINGS_MAP = normalize_dict({
         'Dagr': {
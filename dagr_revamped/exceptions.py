@@ -19,6 +19,13 @@ class DagrHTTPException(DagrException):
             f"HTTP {http_code} error")
         self.http_code = http_code
 
+class DagrIncompleteDownload(DagrException):
+    def __init__(self, expected, received):
+        super().__init__(
+            f"Incomplete download: received {received} of {expected} bytes")
+        self.expected = expected
+        self.received = received
+
 class DagrCacheLockException(Exception):
     pass
 
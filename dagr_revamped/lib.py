@@ -5,14 +5,17 @@ import re
 import string
 import sys
 import threading
-from copy import deepcopy
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import lru_cache
 from mimetypes import add_type as add_mimetype
 from mimetypes import guess_extension
 from mimetypes import init as mimetypes_init
 from pathlib import Path, PurePosixPath
 from pprint import pformat
-from time import time
+from urllib.parse import urljoin
 
 import deviantart
 from bs4 import BeautifulSoup
@@ -21,15 +24,25 @@ from dateutil.parser import parse as date_parse
 from requests import codes as req_codes
 
 from .config import DAGRConfig
-from .DAGRCache import DAGRCache
+from .DAGRCache import DAGRCache, SynchronizedCache
+from .DAGRCacheIndex import OrderedSet
 from .DAGRIo import DAGRIo
 from .exceptions import (DagrCacheLockException, DagrException,
                          DagrHTTPException, DagrPremiumUnavailable)
+from .PageContext import PageContext
 from .plugin import PluginManager
-from .utils import (StatefulBrowser, compare_size, convert_queue,
-                    create_browser, dump_html, filter_deviants, get_base_dir,
-                    get_html_name, load_bulk_files, make_dirs, shorten_url,
-                    sleep, update_d)
+from .RateLimiter import RateLimiter
+from .TCPKeepAliveSession import TCPKeepAliveSession
+from .utils import (CHUNK_SIZE, StatefulBrowser, compare_size, compile_regex,
+                    conditional_headers, convert_queue, create_browser,
+                    deviation_id, dump_html, filter_deviants, get_base_dir,
+                    get_html_name, load_bulk_files, make_dirs,
+                    response_validators, shorten_url, sleep, update_d)
+
+try:
+    from lxml import html as lxml_html
+except ModuleNotFoundError:
+    lxml_html = None
 
 logger = logging.getLogger(__name__)
 
@@ -71,9 +84,8 @@ class DAGR():
         self.outdir = lambda: self.config.output_dir
         self.overwrite = lambda: self.config.get('dagr', 'overwrite')
         self.progress = lambda: self.config.get('dagr', 'saveprogress')
-        self.download_delay = lambda: self.config.get('dagr', 'downloaddelay')
-        self.resolve_rate_limit = lambda: self.config.get(
-            'dagr', 'resolveratelimit')
+        self.pipeline_workers = lambda: self.config.get(
+            'dagr.pipeline', 'workers') or 1
         self.retry_exception_names = lambda: (
             k for k, v in self.config.get('dagr.retry.exceptionnames').items() if v)
         self.retry_sleep_duration = lambda: self.config.get(
@@ -85,12 +97,15 @@ class DAGR():
         self.deviation_crawler = None
         self.deviation_processor = None
         self.deviant_resolver = None
+        # Replaces the serial and pipelined processing, e.g. DAGRAsync
+        self.deviations_engine = None
         self.cache = None
         self.io = None
         self.stop_running = threading.Event()
+        self.rate_limiter = RateLimiter.create(self.config)
+        self.__session_retry_statuses = set()
         self.pl_manager = (kwargs.get('pl_manager') or PluginManager)(self)
         self.total_dl_count = 0
-        self.__last_resolved = None
         self.init_mimetypes()
         self.init_classes()
 
@@ -146,6 +161,14 @@ class DAGR():
         if not self.browser:
             self.browser = self.__kwargs.get('browser') or self.plugin_class_init(
                 'browser', create_browser)(self.mature)
+            session = getattr(self.browser, 'session', None)
+            if not session is None:
+                # Every response feeds the adaptive pacing once
+                session.hooks['response'].append(
+                    self.rate_limiter.response_hook)
+                if isinstance(session, TCPKeepAliveSession):
+                    # Statuses urllib3 already retries are not retried again
+                    self.__session_retry_statuses = session.retry_statuses
 
     def crawler_cache_init(self):
         if not self.crawler_cache:
@@ -263,9 +286,10 @@ class DAGR():
         base_dir, rel_dir = get_base_dir(self.config, mode, deviant, mval)
         crawl_mode = 'full' if self.maxpages is None else 'short'
         if base_dir.exists():
-            cache = self.cache(self.config, base_dir, cache_io=self.io(
+            cache = self.cache(self.config, self.io.create(
                 base_dir, rel_dir, self.config))
             last_crawled = cache.last_crawled.get(crawl_mode)
+            cache.close()
             if last_crawled == 'never':
                 logger.debug('%s: never crawled', base_dir)
                 return True
@@ -386,8 +410,25 @@ class DAGR():
             deviant_lower = deviant.lower()
         try:
             with self.cache.get_cache(self.config, mode, deviant, mval, dagr_io=self.io) as cache:
+                if self.stream_crawl():
+                    logger.log(15, 'Processing deviations while crawling %s', msg_formatted)
+                    crawl = {'finished': False}
+                    errors = len(self.error_report)
+                    self.process_deviations(cache, track_finished(self.deviation_crawler.crawl_iter(
+                        url_fmt, mode, deviant, mval, msg_formatted, full_crawl=self.fullcrawl, cache=cache), crawl))
+                    if not (crawl['finished'] and self.keep_running()):
+                        # Stopped before the crawl finished, the gallery
+                        # must not be recorded as crawled
+                        cache.discard_validators()
+                        return
+                    if len(self.error_report) > errors:
+                        # A 304 next run would skip the failed deviations
+                        cache.discard_validators()
+                    if not self.test:
+                        cache.save_extras(self.maxpages is None)
+                    return
                 pages = self.crawl_pages(
-                    url_fmt, mode, deviant, mval, msg_formatted)
+                    url_fmt, mode, deviant, mval, msg_formatted, cache=cache)
                 if not self.keep_running():
                     return
                 if not pages and not self.nocrawl:
@@ -400,7 +441,11 @@ class DAGR():
                     return
                 logger.log(15, 'Total deviations in %s found: %s',
                            msg_formatted, len(pages))
+                errors = len(self.error_report)
                 self.process_deviations(cache, pages)
+                if not self.keep_running() or len(self.error_report) > errors:
+                    # A 304 next run would skip the unfinished deviations
+                    cache.discard_validators()
                 if not self.nocrawl and not self.test:
                     cache.save_extras(self.maxpages is None)
         except (DagrCacheLockException):
@@ -415,55 +460,50 @@ class DAGR():
         except DagrCacheLockException:
             pass
 
-    def crawl_pages(self, url_fmt, mode, deviant=None, mval=None, msg_formatted=None):
+    def stream_crawl(self):
+        # Streaming keeps crawl order, which is newest first
+        return not self.nocrawl and self.reverse() and hasattr(self.deviation_crawler, 'crawl_iter')
+
+    def crawl_pages(self, url_fmt, mode, deviant=None, mval=None, msg_formatted=None, cache=None):
         if self.nocrawl:
             logger.debug('No crawl mode, skipping pages crawl')
             return []
-        return self.deviation_crawler.crawl(url_fmt, mode, deviant, mval, msg_formatted, full_crawl=self.fullcrawl)
+        return self.deviation_crawler.crawl(url_fmt, mode, deviant, mval, msg_formatted, full_crawl=self.fullcrawl, cache=cache)
 
     def get_folders(self, url_fmt, folder_regex, deviant):
         deviant_lower = deviant.lower()
         base_url = self.base_url()
         regex = folder_regex.format(**locals())
-        folders = []
+        folders = OrderedSet()
         offset = 0
         while True:
             url = url_fmt.format(**locals())
             html = self.get(url).text
             logger.log(4, pformat(dict(**locals())))
-            k = re.findall(regex, html, re.IGNORECASE)
+            k = compile_regex(regex, re.IGNORECASE).findall(html)
             if k == []:
                 break
             new_folder = False
             for match in k:
-                if match not in folders:
-                    folders.append(match)
+                if folders.add(match):
                     new_folder = True
             if not new_folder:
                 break
             offset += self.config.get('deviantart.offsets', 'folder')
+        folders = folders.to_list()
         if self.reverse():
             folders.reverse()
         logger.debug('Found folders %s', pformat(folders))
         return folders
 
     def resolve_deviant(self, deviant):
-        if self.__last_resolved is not None:
-            delay_needed = self.resolve_rate_limit() - \
-                (time() - self.__last_resolved)
-            if delay_needed > 0:
-                logger.log(15, 'Need to sleep for %.4f seconds', delay_needed)
-                sleep(delay_needed)
-
+        self.rate_limiter.wait('resolve')
         resolver = self.deviant_resolver(self)
-        self.__last_resolved = time()
         result = resolver.resolve(deviant)
         return result
 
-    def process_deviations(self, cache, pages, **kwargs):
+    def prepare_deviations(self, cache, pages, **kwargs):
         logger.log(level=4, msg=pformat(kwargs))
-        dl_delay = self.download_delay()
-        logger.info('Download delay: %s', dl_delay)
         disable_filter = kwargs.get('disable_filter', False)
         verify_exists = kwargs.get(
             'verify_exists', False) is True or self.verifyexists is True
@@ -475,8 +515,12 @@ class DAGR():
             'overwrite', False) is True or self.overwrite() is True
 
         callback = kwargs.get('callback', None)
+        if fix_missing and not self.test:
+            missing = cache.missing_filenames()
+            logger.log(15, 'Cached filenames missing from filesystem: %s', len(missing))
+            cache.prune_filenames(missing)
         if self.nocrawl:
-            pages = cache.existing_pages
+            pages = list(cache.existing_pages)
             if kwargs.get('reverse', False) is not True and self.reverse() is not True:
                 pages.reverse()
 
@@ -488,7 +532,10 @@ class DAGR():
             disable_filter
         ]):
             logger.log(level=15, msg='Filtering links')
-            pages = cache.filter_links(pages)
+            if isinstance(pages, Iterator):
+                pages = (p for p in pages if not cache.check_link(p))
+            else:
+                pages = cache.filter_links(pages)
         else:
             logger.log(level=5, msg=pformat({
                 'overwrite': overwrite,
@@ -497,33 +544,56 @@ class DAGR():
                 'disable_filter': disable_filter
             }))
 
-        page_count = len(pages)
-        logger.log(15, 'Total deviations to download: %s', page_count)
-        fileslist_preload_threshold = self.config.get(
-            'dagr.cache', 'fileslist_preload_threshold')
-        logger.log(
-            level=15, msg=f"fileslist preload threshold: {fileslist_preload_threshold}")
-        if isinstance(fileslist_preload_threshold, int) and fileslist_preload_threshold > 0:
-            if page_count < fileslist_preload_threshold:
-                cache.preload_fileslist_policy = 'disable'
-                logger.log(
-                    level=15, msg='Deviations count below fileslist preload threshold')
-            else:
-                logger.log(
-                    level=15, msg='Deviations count meets fileslist preload threshold')
-                cache.preload_fileslist_policy = 'enable'
+        if isinstance(pages, Iterator):
+            logger.log(15, 'Total deviations to download: unknown while crawling')
+        else:
+            page_count = len(pages)
+            logger.log(15, 'Total deviations to download: %s', page_count)
+            fileslist_preload_threshold = self.config.get(
+                'dagr.cache', 'fileslist_preload_threshold')
+            logger.log(
+                level=15, msg=f"fileslist preload threshold: {fileslist_preload_threshold}")
+            if isinstance(fileslist_preload_threshold, int) and fileslist_preload_threshold > 0:
+                if page_count < fileslist_preload_threshold:
+                    cache.preload_fileslist_policy = 'disable'
+                    logger.log(
+                        level=15, msg='Deviations count below fileslist preload threshold')
+                else:
+                    logger.log(
+                        level=15, msg='Deviations count meets fileslist preload threshold')
+                    cache.preload_fileslist_policy = 'enable'
+        return pages, {
+            'verify_exists': verify_exists,
+            'verify_best': verify_best,
+            'overwrite': overwrite,
+            'callback': callback
+        }
+
+    def process_deviations(self, cache, pages, **kwargs):
+        pages, options = self.prepare_deviations(cache, pages, **kwargs)
+        verify_exists = options['verify_exists']
+        verify_best = options['verify_best']
+        callback = options['callback']
+        logger.info('Rate limits: %s', self.rate_limiter.intervals())
+        if not self.deviations_engine is None:
+            return self.deviations_engine.process_deviations(cache, pages, **options)
+        workers = self.pipeline_workers()
+        if workers > 1 and not self.test and isinstance(self.browser, StatefulBrowser):
+            return self.process_deviations_pipelined(
+                cache, pages, workers, verify_exists=verify_exists, verify_best=verify_best, callback=callback)
         progress = self.progress()
+        page_count = '?' if isinstance(pages, Iterator) else len(pages)
+        dp = None
         for count, link in enumerate(pages, start=1):
-            pstart = time()
             if (not verify_best) and progress > 0 and count % progress == 0:
                 cache.save()
             if not self.keep_running(check_stop=count % progress == 0):
                 return
             logger.info(
-                'Processing deviation %s of %s ( %s )', count, len(pages), link)
-            dp = self.deviation_processor(
-                self, cache, link, verify_exists=verify_exists)
-            downloaded = dp.process_deviation()
+                'Processing deviation %s of %s ( %s )', count, page_count, link)
+            dp = self.reuse_processor(
+                dp, cache, link, verify_exists=verify_exists)
+            dp.process_deviation()
             try:
                 if callback:
                     callback(page_type=dp.found_type, page_link=link, current_page=dp.get_current_page(
@@ -531,22 +601,111 @@ class DAGR():
             except DagrHTTPException as ex:
                 cache.add_httperror(link, ex)
                 self.handle_download_error(link, ex)
-            delay_needed = dl_delay - (time() - pstart)
-            if downloaded and delay_needed > 0:
-                logger.log(15, 'Need to sleep for %.4f seconds', delay_needed)
-                sleep(delay_needed)
         cache.save('force' if self.fixartists else True)
 
+    def process_deviations_pipelined(self, cache, pages, workers, verify_exists=False, verify_best=False, callback=None):
+        logger.info('Pipeline workers: %s', workers)
+        sync_cache = SynchronizedCache(cache)
+        progress = self.progress()
+        page_count = '?' if isinstance(pages, Iterator) else len(pages)
+        pages_iter = enumerate(pages, start=1)
+        in_flight = {}
+        idle = []
+        completed = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dagr-resolve') as resolve_pool, \
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dagr-download') as download_pool:
+            try:
+                while True:
+                    while len(in_flight) < workers * 2 and self.keep_running():
+                        count, link = next(pages_iter, (None, None))
+                        if link is None:
+                            break
+                        logger.info(
+                            'Processing deviation %s of %s ( %s )', count, page_count, link)
+                        if idle:
+                            dp = self.reuse_processor(
+                                idle.pop(), sync_cache, link, verify_exists=verify_exists)
+                        else:
+                            dp = self.deviation_processor(
+                                self, sync_cache, link, verify_exists=verify_exists,
+                                browser=StatefulBrowser(session=self.browser.session))
+                        in_flight[resolve_pool.submit(
+                            dp.resolve_deviation)] = ('resolve', dp)
+                    if not in_flight:
+                        break
+                    done, _pending = wait(
+                        in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, dp = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                            if stage == 'resolve' and result:
+                                # Saved to the resumable .tmp file with the
+                                # same retries as the serial save_content
+                                in_flight[download_pool.submit(
+                                    dp.save_content)] = ('download', dp)
+                                continue
+                            if stage == 'download':
+                                dp.record_download()
+                        except DagrException as ex:
+                            dp.handle_error(ex)
+                        else:
+                            sync_cache.add_link(dp.page_link)
+                        finally:
+                            dp.close_response()
+                        completed += 1
+                        self.__pipeline_callback(sync_cache, dp, callback)
+                        if hasattr(dp, 'reset'):
+                            idle.append(dp)
+                        if (not verify_best) and progress > 0 and completed % progress == 0:
+                            sync_cache.save()
+                    if not self.keep_running(check_stop=progress > 0 and completed % progress == 0):
+                        for future in in_flight:
+                            future.cancel()
+                        return
+            except KeyboardInterrupt:
+                for future in in_flight:
+                    future.cancel()
+                sync_cache.save()
+                self.stop_running.set()
+                return
+        cache.save('force' if self.fixartists else True)
+
+    def reuse_processor(self, dp, cache, page_link, **kwargs):
+        if dp is None or not hasattr(dp, 'reset'):
+            return self.deviation_processor(self, cache, page_link, **kwargs)
+        dp.reset(cache, page_link, **kwargs)
+        return dp
+
+    def __pipeline_callback(self, cache, dp, callback):
+        if not callback:
+            return
+        try:
+            callback(page_type=dp.found_type, page_link=dp.page_link, current_page=dp.get_current_page(
+            ), page_content=dp.get_page_content().content)
+        except DagrHTTPException as ex:
+            cache.add_httperror(dp.page_link, ex)
+            self.handle_download_error(dp.page_link, ex)
+
     def handle_download_error(self, link, link_error):
         logger.warning('Download error (%s) : %s', link, str(link_error))
         self.error_report.append(link_error)
 
-    def get(self, url):
+    def get(self, url, status_codes=None, **kwargs):
         tries = {}
         response = None
         while True:
             try:
-                response = self.get_response(url)
+                response = self.get_response(url, **kwargs)
+                if (self.rate_limiter.pacer.is_throttle(response.status_code)
+                        and not response.status_code in self.__session_retry_statuses
+                        and not response.status_code in (status_codes or [])):
+                    tries['throttled'] = tries.get('throttled', 0) + 1
+                    if tries['throttled'] < 3:
+                        logger.warning('Get throttled : %s', response.status_code)
+                        response.close()
+                        sleep(self.retry_delay())
+                        continue
                 break
             except Exception as ex:
                 except_name = type(ex).__name__.lower()
@@ -556,18 +715,22 @@ class DAGR():
                         tries[except_name] = 0
                     tries[except_name] += 1
                     if tries[except_name] < 3:
-                        sleep(self.retry_sleep_duration())
+                        sleep(self.retry_delay())
                         continue
                     raise DagrException(
                         f'Failed to get url: {url} {except_name}')
                 else:
                     raise DagrException(
                         f'Failed to get url: {url} {except_name}')
-        if not response.status_code == req_codes.ok:
+        if not response.status_code in (status_codes or [req_codes.ok]):
             raise DagrException(
                 f"Incorrect status code : {response.status_code}")
         return response
 
+    def retry_delay(self):
+        # The fixed sleep is stretched to the current pacing backoff
+        return max(self.retry_sleep_duration(), self.rate_limiter.backoff_delay())
+
     def get_response(self, url, *args, **kwargs):
         if isinstance(url, Tag):
             if hasattr(url, 'attrs') and 'href' in url.attrs:
@@ -576,6 +739,12 @@ class DAGR():
 
     def print_dl_total(self):
         logger.info(f"Download total: {self.total_dl_count}")
+        if self.rate_limiter.pacer.throttled:
+            logger.info(f"Throttled responses: {self.rate_limiter.pacer.throttled}")
+        logger.info(f"Request rates: {self.report_rates()}")
+
+    def report_rates(self):
+        return self.rate_limiter.rates()
 
     def print_errors(self):
         errors_formatted = {}
@@ -625,7 +794,7 @@ class APICrawler():
         self.config = ripper.config
         self.da = self.ripper.da_api
 
-    def crawl(self, url_fmt, mode, deviant=None, mval=None, msg_formatted=None):
+    def crawl(self, url_fmt, mode, deviant=None, mval=None, msg_formatted=None, **kwargs):
         mode_action = {
             'favs': self.fetch_favs_deviations,
             'gallery': self.fetch_gallery_deviations
@@ -681,47 +850,184 @@ class APICrawler():
                 pass
 
 
+CRAWL_END_MARKERS = (
+    'This section has no deviations yet!',
+    'This collection has no items yet!',
+    'Sorry, we found no relevant results.',
+    "Sorry, we don't have that many results."
+)
+
+
+def track_finished(pages, state):
+    yield from pages
+    state['finished'] = True
+
+
+@lru_cache(maxsize=None)
+def compile_scanner(art_regex):
+    done_regex = '|'.join(map(re.escape, CRAWL_END_MARKERS))
+    scanner = f"(?P<art>{art_regex})|(?P<done>{done_regex})"
+    # Skip positions that cannot start a match before trying the alternation,
+    # only when the first character is a literal every match starts with
+    if (art_regex[:1].isalnum() and not art_regex[1:2] in ('?', '*', '+', '{')
+            and not '|' in art_regex):
+        leading = ''.join(sorted({art_regex[0]}.union(
+            m[0] for m in CRAWL_END_MARKERS)))
+        scanner = f"(?=[{leading}])(?:{scanner})"
+    return re.compile(scanner, re.IGNORECASE | re.DOTALL)
+
+
 class DAGRCrawler():
     def __init__(self, ripper):
         self.ripper = ripper
         self.config = ripper.config
 
-    def crawl(self, url_fmt, mode, deviant=None, mval=None, msg_formatted=None, **kwargs):
+    def page_urls(self, url_fmt, mode, deviant=None, mval=None):
         base_url = self.ripper.base_url()
-        pages = []
         pages_offset = (self.config.get('deviantart.offsets', 'search')
                         if mode == 'search'
                         else self.config.get('deviantart.offsets', 'page'))
-        art_regex = self.config.get('deviantart.regexes', 'art')
         if deviant:
             deviant_lower = deviant.lower()
         logger.log(level=3, msg=pformat(locals()))
         for page_no in range(0, self.config.get('deviantart', 'maxpages')):
             offset = page_no * pages_offset
-            url = url_fmt.format(**locals())
-            if msg:
-                logger.log(15, 'Crawling %s page %s',
-                           msg_formatted, page_no)
-            try:
-                html = self.ripper.get(url).text
-            except DagrException:
-                logger.warning(
-                    'Could not find %s', url, exc_info=True)
-                return pages
-            if self.ripper.unfindable:
+            yield page_no, url_fmt.format(**locals())
+
+    def scanner(self):
+        return compile_scanner(self.config.get('deviantart.regexes', 'art'))
+
+    def scan_page(self, html, pages, seen):
+        done = False
+        for match in self.scanner().finditer(html):
+            page = match['art']
+            if page is None:
+                done = True
+                continue
+            dev_id = deviation_id(page)
+            key = page if dev_id is None else dev_id
+            if not key in seen:
+                seen.add(key)
+                pages.append(page)
+        return done
+
+    def conditional_crawl(self, cache, full_crawl=False):
+        return not (cache is None or full_crawl) and self.config.get('dagr.cache', 'conditionalcrawl')
+
+    def incremental_pages(self, cache, mode, full_crawl=False):
+        if cache is None or full_crawl:
+            return 0
+        if mode in self.config.get('deviantart', 'ndmodes').split(','):
+            # Search and tag results are not ordered newest first
+            return 0
+        return int(self.config.get('deviantart', 'incrementalpages') or 0)
+
+    def pages_known(self, cache, new_pages):
+        return all(cache.check_link(p) for p in new_pages)
+
+    def record_high_water(self, cache, pages):
+        dev_ids = [i for i in map(deviation_id, pages) if not i is None]
+        if dev_ids:
+            cache.update_high_water(max(dev_ids))
+
+    def crawl_iter(self, url_fmt, mode, deviant=None, mval=None, msg_formatted=None, **kwargs):
+        cache = kwargs.get('cache')
+        conditional = self.conditional_crawl(cache, kwargs.get('full_crawl'))
+        stop_after = self.incremental_pages(
+            cache, mode, kwargs.get('full_crawl'))
+
+        def first_request(url):
+            if cache is None:
+                return {}
+            return {'status_codes': [req_codes.ok, req_codes.not_modified],
+                    'headers': conditional_headers(cache.get_validators(url)) if conditional else {}}
+
+        known_pages = 0
+        seen = set()
+        first_page = None
+        responses = self.page_responses(
+            self.page_urls(url_fmt, mode, deviant, mval), first_request)
+        try:
+            for page_no, url, response in responses:
+                if msg_formatted:
+                    logger.log(15, 'Crawling %s page %s',
+                               msg_formatted, page_no)
+                if page_no == 0 and not cache is None:
+                    if response.status_code == req_codes.not_modified:
+                        logger.log(
+                            15, 'First page %s not modified since last crawl', url)
+                        return
+                    first_page = (url, response_validators(response.headers))
+                if self.ripper.unfindable:
+                    return
+                new_pages = []
+                done = self.scan_page(response.text, new_pages, seen)
+                # Check before yielding, consumers may add the pages to the cache
+                known = stop_after and self.pages_known(cache, new_pages)
+                if not cache is None:
+                    self.record_high_water(cache, new_pages)
+                yield from new_pages
+                if done:
+                    break
+                if stop_after:
+                    if not known:
+                        known_pages = 0
+                    else:
+                        known_pages += 1
+                        if known_pages >= stop_after:
+                            logger.log(
+                                15, 'Stopping crawl after %s pages of known deviations', known_pages)
+                            break
+        finally:
+            responses.close()
+        if not first_page is None:
+            cache.set_validators(*first_page)
+
+    def fetch_page(self, url, **kwargs):
+        self.ripper.rate_limiter.wait('crawl')
+        return self.ripper.get(url, **kwargs)
+
+    def page_responses(self, page_urls, first_request=None):
+        window = max(
+            int(self.config.get('dagr.pipeline', 'crawlprefetch') or 1), 1)
+        page_urls = iter(page_urls)
+        page_no, url = next(page_urls, (None, None))
+        if url is None:
+            return
+        try:
+            # The first page is fetched alone, it may end the crawl early
+            yield page_no, url, self.fetch_page(url, **(first_request(url) if first_request else {}))
+            if window == 1:
+                for page_no, url in page_urls:
+                    yield page_no, url, self.fetch_page(url)
                 return
-            matches = re.findall(art_regex, html,
-                                 re.IGNORECASE | re.DOTALL)
-            for match in matches:
-                if match not in pages:
-                    pages.append(match)
-            done = re.findall("(This section has no deviations yet!|"
-                              "This collection has no items yet!|"
-                              "Sorry, we found no relevant results.|"
-                              "Sorry, we don't have that many results.)",
-                              html, re.IGNORECASE | re.S)
-            if done:
-                break
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=window, thread_name_prefix='dagr-crawl') as pool:
+                try:
+                    while True:
+                        while len(pending) < window:
+                            next_no, next_url = next(page_urls, (None, None))
+                            if next_url is None:
+                                break
+                            pending.append((next_no, next_url, pool.submit(
+                                self.fetch_page, next_url)))
+                        if not pending:
+                            return
+                        # Reported with its own url, not the last submitted
+                        page_no, url, future = pending.popleft()
+                        yield page_no, url, future.result()
+                finally:
+                    for _page_no, _url, future in pending:
+                        future.cancel()
+        except DagrException:
+            logger.warning(
+                'Could not find %s', url, exc_info=True)
+
+    def crawl(self, url_fmt, mode, deviant=None, mval=None, msg_formatted=None, **kwargs):
+        pages = list(self.crawl_iter(
+            url_fmt, mode, deviant, mval, msg_formatted, **kwargs))
+        if self.ripper.unfindable:
+            return
         if not self.ripper.reverse():
             pages.reverse()
         return pages
@@ -766,6 +1072,74 @@ class DAGRDeviantResolver():
         raise DagrException('Unable to get deviant info')
 
 
+FINDLINK_XPATHS = {
+    'img full': "//img[@collect_rid][contains(@class, 'full')]",
+    'meta': "//meta[@property='og:image']",
+    'img normal': "//img[@collect_rid][contains(@class, 'normal')]"
+}
+
+
+def xpath_first(node, path):
+    return next(iter(node.xpath(path)), None)
+
+
+def has_class(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def fast_find_link(content, current_url, fallback_order):
+    # Returns None when the page needs the full soup based search
+    try:
+        root = lxml_html.fromstring(content)
+    except Exception:
+        logger.log(5, 'Fast path unable to parse page', exc_info=True)
+        return None
+    link_text = re.compile('Download( (Image|File))?')
+    for candidate in root.xpath('//a[@href]'):
+        if link_text.search(candidate.text_content()):
+            if candidate.get('data-download_url'):
+                return urljoin(current_url, candidate.get('href')), 'download'
+            break
+    img_link = xpath_first(
+        root, "//a[contains(@href, 'deviantart.com/download/')]")
+    if not img_link is None:
+        return urljoin(current_url, img_link.get('href')), 'download'
+    stage = xpath_first(root, "//div[@data-hook='art_stage']")
+    if not stage is None:
+        if stage.xpath(".//div[.='Premium Deviation']"):
+            raise DagrPremiumUnavailable()
+        img_tag = xpath_first(stage, './/img')
+        if not img_tag is None:
+            return (img_tag.get('src'), 'art_stage') if img_tag.get('src') else None
+        pdf_object = xpath_first(stage, ".//object[@type='application/pdf']")
+        if not pdf_object is None:
+            return pdf_object.get('data'), 'pdf_object'
+    page_title = xpath_first(root, "//span[@itemprop='title']")
+    if not page_title is None and page_title.text_content() == 'Literature':
+        return current_url, 'literature'
+    if root.xpath("//h2[.='Literature Text']"):
+        return current_url, 'literature'
+    if 'journal' in current_url or root.xpath(f"//div[{has_class('journal-wrapper')}]"):
+        return current_url, 'journal'
+    if root.xpath(f"//div[{has_class('antisocial')}]"):
+        return None
+    for si in fallback_order:
+        if not si in FINDLINK_XPATHS:
+            continue
+        tag = xpath_first(root, FINDLINK_XPATHS[si])
+        if tag is None:
+            continue
+        if si == 'meta':
+            filelink = tag.get('content')
+            if not filelink or Path(filelink).name.startswith('noentrythumb-') or 'st.deviantart.net' in filelink:
+                continue
+        else:
+            filelink = tag.get('src')
+        if filelink:
+            return filelink, si
+    return None
+
+
 class DAGRDeviationProcessor():
     def __init__(self, ripper, cache, page_link, **kwargs):
         self.__id = ''.join(random.choices(
@@ -773,9 +1147,27 @@ class DAGRDeviationProcessor():
         logger.debug('Created DAGRDeviationProcessor %s', self.__id)
         self.ripper = ripper
         self.config = ripper.config
-        self.browser = ripper.browser
-        self.base_dir = cache.base_dir
+        self.browser = None
+        self.base_dir = None
+        self.cache = None
+        self.__limiter = self.ripper.rate_limiter
+        # self.__html_dump_loc = self.config.get(
+        #     'dagr.html', 'dumplocation')
+        self.__verify_debug_loc = self.config.get(
+            'dagr.verify', 'debuglocation')
+        self.__findlink_debug_loc = self.config.get(
+            'dagr.findlink', 'debuglocation')
+        self.__fast_path_enabled = bool(self.config.get(
+            'dagr.findlink', 'fastpath')) and not lxml_html is None
+        self.__response = None
+        self.reset(cache, page_link, **kwargs)
+
+    def reset(self, cache, page_link, **kwargs):
+        self.close_response()
+        # Reused processors may move on to a different gallery
         self.cache = cache
+        self.base_dir = cache.base_dir
+        self.browser = kwargs.get('browser') or self.browser or self.ripper.browser
         self.page_link = page_link
         self.__file_link = kwargs.get('file_link')
         self.__filename = kwargs.get('filename')
@@ -790,17 +1182,14 @@ class DAGRDeviationProcessor():
         self.__force_verify_exists = self.ripper.verifyexists if force_verify_exists is None else force_verify_exists
         self.__response = kwargs.get('response')
         self.__file_ext = kwargs.get('file_ext')
-        # self.__html_dump_loc = self.config.get(
-        #     'dagr.html', 'dumplocation')
-        self.__verify_debug_loc = self.config.get(
-            'dagr.verify', 'debuglocation')
-        self.__findlink_debug_loc = self.config.get(
-            'dagr.findlink', 'debuglocation')
+        self.__page_content = kwargs.get('page_content')
+        self.__page_pending = False
+        self.__page_context = None
+        self.__fast_path = self.__fast_path_enabled and isinstance(
+            self.browser, StatefulBrowser)
         self.__content_type = None
         self.__mature_error = None
-        self.__page_content = None
         self.__current_page = None
-        self.__files_list = None
 
     def __del__(self):
         logger.debug('Destroying DAGRDeviationProcessor %s', self.__id)
@@ -813,13 +1202,9 @@ class DAGRDeviationProcessor():
     def found_type(self):
         return self.__found_type
 
-    def get_files_list(self):
-        if self.__files_list is None:
-            self.__files_list = self.cache.files_list
-        return self.__files_list
-
     def get_current_page(self):
         if self.__current_page is None:
+            self.open_page()
             self.__current_page = self.browser.get_current_page()
         return self.__current_page
 
@@ -828,9 +1213,100 @@ class DAGRDeviationProcessor():
             return self.__response
         logger.log(4, 'get_response no resonse')
         flink, _ltype = self.find_link()
-        self.__response = self.ripper.get(flink)
+        self.__limiter.wait('media')
+        partial = self.get_partial()
+        if partial is None:
+            self.__response = self.ripper.get(flink, stream=True)
+        else:
+            self.__response = self.get_range_response(flink, partial)
         return self.__response
 
+    def get_partial(self):
+        cache_io = self.cache.cache_io
+        if not cache_io.supports_resume:
+            return None
+        fname = self.__dest.name if self.__dest else (
+            self.__filename or f"{PurePosixPath(self.page_link).name}.tmp")
+        return cache_io.partial_info(fname=fname)
+
+    def range_headers(self, partial):
+        received = partial['received']
+        validator = partial.get('etag') or partial.get('last_modified')
+        logger.info('Resuming download of %s from byte %s of %s',
+                    self.page_link, received, partial['size'])
+        return {'Range': f"bytes={received}-", 'If-Range': validator}
+
+    def range_offset(self, response, partial):
+        # Where the body of a response to range_headers starts,
+        # None if it can't be used and the download has to restart
+        received = partial['received']
+        if response.status_code == req_codes.partial_content:
+            content_range = re.match(
+                r'bytes\s+(\d+)-\d+/(\d+)', response.headers.get('content-range', ''))
+            if content_range and int(content_range[1]) == received and int(content_range[2]) == partial['size']:
+                return received
+            logger.warning('Unexpected content range %s, restarting download',
+                           response.headers.get('content-range'))
+        elif response.status_code == req_codes.ok:
+            logger.info('Partial download of %s is stale, restarting download', self.page_link)
+            return 0
+        elif not response.status_code == req_codes.requested_range_not_satisfiable:
+            raise DagrHTTPException(response.status_code)
+        return None
+
+    def get_range_response(self, flink, partial):
+        try:
+            response = self.ripper.get_response(
+                flink, stream=True, headers=self.range_headers(partial))
+        except Exception:
+            logger.warning('Range request failed', exc_info=True)
+            return self.ripper.get(flink, stream=True)
+        try:
+            offset = self.range_offset(response, partial)
+        except DagrHTTPException:
+            response.close()
+            raise
+        if not offset is None:
+            self.__resume_offset = offset
+            return response
+        response.close()
+        return self.ripper.get(flink, stream=True)
+
+    def set_response(self, response, resume_offset=0):
+        self.__response = response
+        self.__resume_offset = resume_offset
+
+    def close_response(self):
+        if hasattr(self.__response, 'close'):
+            self.__response.close()
+        self.__response = None
+        self.__resume_offset = 0
+
+    def get_content(self):
+        response = self.get_response()
+        if hasattr(response, 'iter_content'):
+            return response.iter_content(CHUNK_SIZE)
+        return response.content
+
+    def get_expected_size(self):
+        headers = self.get_response().headers
+        if self.__resume_offset:
+            return int(headers['content-range'].rpartition('/')[2])
+        content_length = headers.get('content-length', '')
+        if content_length.isdigit() and headers.get('content-encoding', 'identity') == 'identity':
+            return int(content_length)
+        return None
+
+    def get_validators(self):
+        return response_validators(self.get_response().headers)
+
+    def get_content_length(self):
+        content_length = self.get_expected_size()
+        if content_length is None:
+            logger.log(4, 'No usable content-length, reading response body')
+            return len(self.get_response().content)
+        return content_length
+
     def get_rheaders(self):
         r = self.get_response()
         return r.headers
@@ -864,17 +1340,22 @@ class DAGRDeviationProcessor():
             return self.__filename
         logger.log(4, 'get_fname no filename')
         shortname = PurePosixPath(self.page_link).name
-        try:
-            self.__filename = self.cache.real_filename(shortname)
-            if not self.__filename is None:
-                return self.__filename
-        except StopIteration:
-            pass
+        self.__filename = self.cached_fname()
+        if not self.__filename is None:
+            return self.__filename
         logger.log(4, '%s not in filenames cache', shortname)
         fext = self.get_fext()
         self.__filename = Path(shortname).with_suffix(fext).name
         return self.__filename
 
+    def cached_fname(self):
+        if self.__filename:
+            return self.__filename
+        try:
+            return self.cache.real_filename(PurePosixPath(self.page_link).name)
+        except StopIteration:
+            return None
+
     def get_dest(self):
         if self.__dest:
             return self.__dest
@@ -890,6 +1371,7 @@ class DAGRDeviationProcessor():
                 return
             if self.download_needed():
                 self.download_link()
+            self.close_response()
         except KeyboardInterrupt:
             try:
                 inp = input('Do you want to quit? : ').lower()
@@ -905,22 +1387,29 @@ class DAGRDeviationProcessor():
         except SystemExit:
             self.cache.save()
             self.ripper.stop_running.set()
-        except DagrPremiumUnavailable as ex:
-            self.cache.add_premium(self.page_link)
-            self.ripper.handle_download_error(self.page_link, ex)
-        except DagrHTTPException as ex:
-            self.cache.add_httperror(self.page_link, ex)
-            self.ripper.handle_download_error(self.page_link, ex)
         except DagrException as ex:
-            self.ripper.handle_download_error(self.page_link, ex)
+            self.handle_error(ex)
         else:
             self.cache.add_link(self.page_link)
         return not (self.__page_content is None)
 
+    def resolve_deviation(self):
+        self.get_page_content()
+        return self.download_needed()
+
+    def handle_error(self, ex):
+        if isinstance(ex, DagrPremiumUnavailable):
+            self.cache.add_premium(self.page_link)
+        elif isinstance(ex, DagrHTTPException):
+            self.cache.add_httperror(self.page_link, ex)
+        self.ripper.handle_download_error(self.page_link, ex)
+
     def download_link(self):
-        fname = self.get_fname()
         self.save_content()
-        self.cache.add_filename(fname)
+        self.record_download()
+
+    def record_download(self):
+        self.cache.add_filename(self.get_fname())
         self.ripper.total_dl_count += 1
 
     def download_needed(self):
@@ -944,36 +1433,38 @@ class DAGRDeviationProcessor():
         logger.info('Verifying %s', self.page_link)
         _flink, ltype = self.find_link()
         if not ltype in best_res:
-            self.__logger.info('Not a full image, found type is %s', ltype)
+            logger.info('Not a full image, found type is %s', ltype)
             return False
 
         if self.get_fext() in ['.htm', '.html']:
-            self.__logger.info('Skipping html file')
+            logger.info('Skipping html file')
             return False
         fname = self.get_fname()
-        response = self.get_response()
-        if compare_size(self.cache.cache_io, fname, response.content):
-            self.__logger.info('Sizes match, found type is %s', ltype)
+        if compare_size(self.cache.cache_io, fname, self.get_content_length()):
+            logger.info('Sizes match, found type is %s', ltype)
             return False
         if self.__verify_debug_loc:
             if not self.cache.cache_io.dir_exists(dir_name=self.__verify_debug_loc):
                 self.cache.cache_io.mkdir(dir_name=self.__verify_debug_loc)
 
             self.cache.cache_io.replace(dest_fname=fname, dest_subdir=self.__verify_debug_loc, src_fname=fname)
-            self.__logger.debug('Debug file %s/%s/%s', self.cache.rel_dir, self.__verify_debug_loc, fname)
+            logger.debug('Debug file %s/%s/%s', self.cache.rel_dir, self.__verify_debug_loc, fname)
         return True
 
     def verify_exists(self, warn_on_existing=True):
         fname = self.get_fname()
         if not self.force_verify_exists:
-            if fname in self.get_files_list():
+            if self.cache.has_filename(fname):
                 if warn_on_existing:
                     logger.warning("Cache entry %s exists - skipping", fname)
                 return False
         #dest = self.get_dest()
         if self.force_verify_exists:
             logger.log(5, 'Verifying %s really exists', fname)
-        if self.cache.cache_io.exists(fname=fname):
+            exists = self.cache.fs_exists(fname)
+        else:
+            exists = self.cache.cache_io.exists(fname=fname)
+        if exists:
             self.cache.add_filename(fname)
             logger.warning("FS entry %s exists - skipping", fname)
             return False
@@ -985,18 +1476,25 @@ class DAGRDeviationProcessor():
         while True:
             try:
                 response = self.get_response()
-                self.cache.cache_io.write_bytes(
-                    self.__response.content, dest=dest)
+                cache_io = self.cache.cache_io
+                if cache_io.supports_resume:
+                    cache_io.write_bytes(
+                        self.get_content(), dest=dest, offset=self.__resume_offset,
+                        expected_size=self.get_expected_size(), validators=self.get_validators())
+                else:
+                    cache_io.write_bytes(
+                        self.get_content(), dest=dest)
                 break
             except Exception as ex:
                 except_name = type(ex).__name__.lower()
                 logger.debug('Exception while saving link', exc_info=True)
+                self.close_response()
                 if [re for re in self.ripper.retry_exception_names() if except_name in re]:
                     if not except_name in tries:
                         tries[except_name] = 0
                     tries[except_name] += 1
                     if tries[except_name] < 3:
-                        sleep(self.ripper.retry_sleep_duration())
+                        sleep(self.ripper.retry_delay())
                         continue
                     raise DagrException(
                         f"Failed to save content: {except_name}")
@@ -1019,10 +1517,31 @@ class DAGRDeviationProcessor():
             raise DagrException('Missing content-type')
         return self.__content_type
 
+    def get_page_context(self):
+        if self.__page_context is None:
+            resp = self.get_page_content()
+            page_url = resp.url if self.__page_pending else self.browser.get_url()
+            self.__page_context = PageContext(
+                page_url, resp.content, self.get_current_page, session=self.browser.session)
+        return self.__page_context
+
+    def open_page(self):
+        if self.__page_pending:
+            self.browser.open_fake_page(
+                self.__page_content.content, self.__page_content.url)
+            self.__page_pending = False
+
     def get_page_content(self):
         if self.__page_content:
             return self.__page_content
-        self.__page_content = self.browser.open(self.page_link)
+        self.__limiter.wait('page')
+        if self.__fast_path:
+            # The soup is only built if the fast path fails
+            self.__page_content = self.browser.session.get(
+                self.page_link, timeout=150)
+            self.__page_pending = True
+        else:
+            self.__page_content = self.browser.open(self.page_link)
 
         if not self.__page_content.status_code == req_codes.ok:
             raise DagrHTTPException(self.__page_content.status_code)
@@ -1035,8 +1554,15 @@ class DAGRDeviationProcessor():
         logger.log(4, 'find_link no file_link')
         filelink = None
         resp = self.get_page_content()
-        current_url = self.browser.get_url()
+        if self.__fast_path:
+            found = fast_find_link(
+                resp.content, resp.url, self.ripper.fallbackorder())
+            if not found is None:
+                logger.log(5, 'Fast path found %s', found[1])
+                self.__file_link, self.__found_type = found
+                return self.__file_link, self.__found_type
         current_page = self.get_current_page()
+        current_url = self.browser.get_url()
         # Full image link (via download link)
         link_text = re.compile('Download( (Image|File))?')
         img_link = None
@@ -1136,22 +1662,17 @@ class DAGRDeviationProcessor():
             else:
                 logger.log(5, '%s not found', si)
 
-        for pl_name, pl_func in [*self.ripper.pl_manager.get_funcs('findlink').items()]:
-            filelink = pl_func(current_page)
-            if filelink:
-                logger.log(5, 'Found %s', pl_name)
-                self.__file_link, self.__found_type = filelink, pl_name
-                return self.__file_link, self.__found_type
-        for pl_name, pl_func in [*self.ripper.pl_manager.get_funcs('findlink_b').items()]:
-            temp_browser = StatefulBrowser(
-                session=deepcopy(self.browser.session))
-            temp_browser.open_fake_page(
-                deepcopy(resp.content), current_url)
-            filelink = pl_func(temp_browser)
-            if filelink:
-                logger.log(5, 'Found %s', pl_name)
-                self.__file_link, self.__found_type = filelink, pl_name
-                return self.__file_link, self.__found_type
+        page_context = self.get_page_context()
+        for pl_cat, pl_arg in [
+                ('findlink_context', lambda: page_context),
+                ('findlink', lambda: page_context.soup),
+                ('findlink_b', lambda: page_context.browser)]:
+            for pl_name, pl_func in [*self.ripper.pl_manager.get_funcs(pl_cat).items()]:
+                filelink = pl_func(pl_arg())
+                if filelink:
+                    logger.log(5, 'Found %s', pl_name)
+                    self.__file_link, self.__found_type = filelink, pl_name
+                    return self.__file_link, self.__found_type
         self.cache.add_nolink(self.page_link)
         # Check for antisocial
         if self.ripper.antisocial() and current_page.find('div', {'class': 'antisocial'}):
@@ -66,6 +66,10 @@ class PluginManager():
             return copy(self.__app.config)
         return deepcopy(self.__app.config)
 
+    @property
+    def rate_limiter(self):
+        return self.__app.rate_limiter
+
     @property
     def output_dir(self):
         return Path(self.__app.config.output_dir)
@@ -84,6 +88,9 @@ class PluginManager():
     def register_findlink_b(self, name, func):
         self.__register('findlink_b', name, func)
 
+    def register_findlink_context(self, name, func):
+        self.__register('findlink_context', name, func)
+
     def register_browser(self, name, func):
         self.__register('browser', name, func)
 
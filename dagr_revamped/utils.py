@@ -4,12 +4,17 @@ import json
 import logging
 import math
 import re
+import struct
 from collections.abc import Iterable, Mapping
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from hashlib import md5
-from io import BytesIO, StringIO, TextIOWrapper
+from io import BytesIO, TextIOWrapper
 from pathlib import Path, PurePath, PurePosixPath
 from pprint import pformat, pprint
 from random import choice
+from tempfile import SpooledTemporaryFile
 from time import sleep as time_sleep
 
 from mechanicalsoup import StatefulBrowser
@@ -22,8 +27,23 @@ from .exceptions import DagrCacheLockException, DagrException
 from .HTTPLockManager import HTTPLockManager
 from .TCPKeepAliveSession import TCPKeepAliveSession
 
+try:
+    import msgpack
+except ModuleNotFoundError:
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+MSGPACK_MAGIC = b'\x00DAGRMP1'
+MSGPACK_HEADER = struct.Struct('>Q')
+CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def compile_regex(pattern, flags=0):
+    return re.compile(pattern, flags)
+
 
 def make_dirs(directory):
     if not isinstance(directory, Path):
@@ -134,14 +154,57 @@ def get_base_dir(config, mode, deviant=None, mval=None):
     return base_dir, base_dir.relative_to(directory)
 
 
-def buffered_file_write(json_content, fname):
+def serialize_json(content):
+    return json.dumps(content, indent=4, sort_keys=True).encode()
+
+
+def serialize_compact_json(content):
+    return json.dumps(content, separators=(',', ':')).encode()
+
+
+def serialize_msgpack(content):
+    payload = msgpack.packb(content, use_bin_type=True)
+    return MSGPACK_MAGIC + MSGPACK_HEADER.pack(len(payload)) + payload
+
+
+SERIALIZERS = {
+    'json': serialize_json,
+    'compact': serialize_compact_json,
+    'msgpack': serialize_msgpack
+}
+
+
+def get_serializer(name=None):
+    name = (name or 'json').lower()
+    if not name in SERIALIZERS:
+        raise ValueError(f"Unknown serializer: {name}")
+    if name == 'msgpack' and msgpack is None:
+        logger.warning(
+            'Package msgpack not available, falling back to compact json')
+        name = 'compact'
+    return SERIALIZERS[name]
+
+
+def deserialize(data):
+    if data.startswith(MSGPACK_MAGIC):
+        if msgpack is None:
+            raise DagrException(
+                'Required package msgpack not available')
+        start = len(MSGPACK_MAGIC) + MSGPACK_HEADER.size
+        (length,) = MSGPACK_HEADER.unpack(data[len(MSGPACK_MAGIC):start])
+        payload = data[start:start + length]
+        if len(payload) != length:
+            raise ValueError(
+                f"Truncated msgpack content: expected {length} bytes, got {len(payload)}")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(data)
+
+
+def buffered_file_write(json_content, fname, serializer=None):
     if not isinstance(fname, Path):
         fname = Path(fname)
-    buffer = StringIO()
-    json.dump(json_content, buffer, indent=4, sort_keys=True)
-    buffer.seek(0)
     temp = fname.with_suffix('.tmp')
-    temp.write_text(buffer.read())
+    temp.write_bytes(get_serializer(serializer)(json_content))
     temp.rename(fname)
 
 
@@ -295,11 +358,42 @@ def filter_deviants(dfilter, queue):
     return results
 
 
+def response_validators(headers):
+    return {k: v for k, v in [('etag', headers.get('etag')), ('last_modified', headers.get('last-modified'))] if v}
+
+
+def retry_after_seconds(value):
+    # Retry-After is either a number of seconds or a HTTP date
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def conditional_headers(validators):
+    headers = {}
+    if validators:
+        if 'etag' in validators:
+            headers['If-None-Match'] = validators['etag']
+        if 'last_modified' in validators:
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
 def compare_size(cache_io, fname, content):
     if not cache_io.exists(fname=fname, update_cache=False):
         return False
     current_size = cache_io.stat(fname=fname).get('st_size')
-    best_size = len(content)
+    best_size = content if isinstance(content, int) else len(content)
     if current_size >= best_size:
         return True
     logger.info('Current file %s is smaller by %s bytes',
@@ -359,6 +453,16 @@ def unlink_lockfile(lockfile):
             logger.warning('Unable to unlock {}'.format(lockfile.parent))
 
 
+def deviation_id(url):
+    path = url.split('?', 1)[0].split('#', 1)[0].rstrip('/')
+    if '/' in path and not '/art/' in path:
+        return None
+    _rest, sep, dev_id = path.rpartition('-')
+    if not sep or not dev_id.isdecimal() or not dev_id.isascii():
+        return None
+    return int(dev_id)
+
+
 def shorten_url(url):
     p = PurePosixPath()
     for u in Path(url).parts[2:]:
@@ -389,33 +493,60 @@ def artist_from_url(url, mode=None):
     return (artist_url_p, artist_name, shortname)
 
 
-def save_json(fpath, data, do_backup=True):
+def save_json(fpath, data, do_backup=True, serializer=None):
     if isinstance(data, set):
         data = list(data)
     fp = ensure_path(fpath)
     if do_backup:
         backup_cache_file(fp)
-    buffered_file_write(data, fp)
+    buffered_file_write(data, fp, serializer)
     logger.log(
         level=15, msg=f"Saved {len(data)} items to {fp}")
 
 
 def load_json(fpath):
+    if hasattr(fpath, 'read'):
+        data = fpath.read()
+        return deserialize(data.encode() if isinstance(data, str) else data)
     fp = ensure_path(fpath)
-    buffer = StringIO(fp.read_text())
-    return json.load(buffer)
+    return deserialize(fp.read_bytes())
 
 
 def ensure_path(fpath, resolve=True):
     return (fpath if isinstance(fpath, Path) else Path(fpath)).resolve()
 
 
+def iter_chunks(content, chunk_size=CHUNK_SIZE):
+    if isinstance(content, (bytes, bytearray)):
+        yield content
+    elif hasattr(content, 'read'):
+        while chunk := content.read(chunk_size):
+            yield chunk
+    else:
+        for chunk in content:
+            if chunk:
+                yield chunk
+
+
+def spool_content(content, integrity=None):
+    spool = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    for chunk in iter_chunks(content):
+        if not integrity is None:
+            integrity.update(chunk)
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
 def http_encode_multipart(dir_path, filename, content):
 
     if isinstance(content, str):
         integrity = md5(content.encode())
-    else:
+    elif isinstance(content, (bytes, bytearray)):
         integrity = md5(content)
+    else:
+        integrity = md5()
+        content = spool_content(content, integrity)
 
     return MultipartEncoder(
         fields={'params': json.dumps(dict(
@@ -517,6 +648,10 @@ def http_exists(session, endpoint, dir_path, itemname=None, update_cache=None):
     return http_fetch_json(session, endpoint, path=dir_path, itemname=itemname, update_cache=update_cache)['exists']
 
 
+def http_exists_many(session, endpoint, dir_path, itemnames):
+    return set(http_post_json(session, endpoint, path=dir_path, itemnames=itemnames)['exists'])
+
+
 def http_list_dir(session, endpoint, dir_path):
     return http_fetch_json(session, endpoint, path=dir_path)
 
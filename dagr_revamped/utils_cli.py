@@ -1,7 +1,7 @@
 import logging
 import shutil
 from os import scandir
-from pathlib import PurePosixPath
+from pathlib import Path, PurePosixPath
 from pprint import pformat
 from time import time
 
@@ -11,12 +11,13 @@ from .config import DAGRConfig
 from .dagr_logging import init_logging
 from .dagr_logging import log as dagr_log
 from .DAGRCache import DAGRCache
+from .DAGRDeviationIndex import DAGRDeviationIndex
 from .DAGRIo import DAGRIo
 from .DAGRManager import DAGRManager
 from .exceptions import DagrCacheLockException
-from .utils import (buffered_file_write, convert_queue, filter_deviants,
-                    get_base_dir, load_bulk_files, strip_topdirs,
-                    update_bulk_list)
+from .utils import (artist_from_url, buffered_file_write, convert_queue,
+                    filter_deviants, get_base_dir, get_serializer,
+                    load_bulk_files, strip_topdirs, update_bulk_list)
 from .version import version
 
 logger = logging.getLogger(__name__)
@@ -30,20 +31,24 @@ class DAGRUtilsCli():
 Usage:
 dagr-utils.py renamedeviant OLD NEW [-v|-vv|--debug=DEBUGLVL] FILENAMES...
 dagr-utils.py shortenurlcache [-v|-vv|--debug=DEBUGLVL] FILENAMES...
-dagr-utils.py finddupes [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
+dagr-utils.py finddupes [--useindex] [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
 dagr-utils.py updatedirscache [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
 dagr-utils.py findnolinks [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
 dagr-utils.py fixnolinks [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
 dagr-utils.py fixartists [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
 dagr-utils.py processqueue [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
-dagr-utils.py extractdeviant [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] DEVIANT FILENAMES
+dagr-utils.py extractdeviant [--useindex] [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] DEVIANT FILENAMES
 dagr-utils.py updatebulk [--forcesave] [-v|-vv|--debug=DEBUGLVL]
 dagr-utils.py updatebulk [--forcesave] [-v|-vv|--debug=DEBUGLVL]
 dagr-utils.py mergefolders [--deleteafter] [-v|-vv|--debug=DEBUGLVL] FOLDERNAMES...
+dagr-utils.py convertcache [--serializer=SERIALIZER] [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
+dagr-utils.py buildindex [--filter=FILTER] [-v|-vv|--debug=DEBUGLVL] FILENAMES
 
 Options:
     -v --verbose                            Show more detail, -vv for debug
     --debug=DEBUGLVL                        Show still more detail
+    --serializer=SERIALIZER                 Cache file format: json, compact or msgpack [default: compact]
+    --useindex                              Use the deviations index when it is up to date
 
     """
     NAME = __package__
@@ -72,11 +77,15 @@ Options:
             'processqueue': arguments.get('processqueue'),
             'extractdeviant': arguments.get('extractdeviant'),
             'updatebulk': arguments.get('updatebulk'),
+            'convertcache': arguments.get('convertcache'),
+            'buildindex': arguments.get('buildindex'),
+            'serializer': arguments.get('--serializer'),
             'deviant': arguments.get('DEVIANT'),
             'filenames': arguments.get('FILENAMES'),
             'foldernames': arguments.get('FOLDERNAMES'),
             'filter': arguments.get('--filter'),
             'forcesave': arguments.get('--forcesave'),
+            'useindex': arguments.get('--useindex'),
             'old': arguments.get('OLD'),
             'new': arguments.get('NEW'),
         }
@@ -96,7 +105,9 @@ class DAGRUtils():
             'processqueue': self.process_queue,
             'extractdeviant': self.extract_deviant,
             'updatebulk': self.update_bulk,
-            'mergefolders': self.merge_folders
+            'mergefolders': self.merge_folders,
+            'convertcache': self.convert_cache,
+            'buildindex': self.build_index
         }
         self.__utils_cmd = next(
             (cmd for cmd in self.__utils_cmd_maping.keys() if kwargs.get(cmd)), None)
@@ -107,6 +118,9 @@ class DAGRUtils():
         self.__foldernames = kwargs.get('foldernames')
         self.__deviant = kwargs.get('deviant')
         self.__force_save = kwargs.get('forcesave')
+        self.__serializer = kwargs.get('serializer')
+        self.__use_index = bool(kwargs.get('useindex') or self.__config.get(
+            'dagr.cache', 'deviationindex'))
         self.__deviant_gallery_cache = self.__cache.get_cache(
             self.__config, 'gallery', self.__deviant, None, warn_not_found=False) if self.__deviant else None
         self.__filter = None if kwargs.get('filter') is None else [
@@ -117,6 +131,7 @@ class DAGRUtils():
         if cachepath:
             self.__exclude_dirs.append(cachepath.lower())
         self.__global_files_mapping = {}
+        self.__deviation_index = None
         self.__global_dirs_mapping = {}
         self.__global_deviant_dirs_cache = dict((d.name.lower(), d) for d in (
             di for di in scandir(self.__config.output_dir) if di.is_dir() and not di.name.lower() in self.__exclude_dirs))
@@ -184,10 +199,72 @@ class DAGRUtils():
                             {'deviant': di.name, 'mode': mode_sd.name})
         update_bulk_list(self.__config, bulk_cache, self.__force_save)
 
+    def _index_is_current(self, index):
+        # The index is only kept up to date while DeviationIndex is enabled,
+        # it is not used if any cache was changed after its last update
+        if not self.__use_index or not index.exists():
+            return False
+        index_mtime = index.mtime()
+        cache_names = [self.__config.get('dagr.cache', 'filenames'),
+                       self.__config.get('dagr.cache', 'downloadedpages')]
+        cache_names.extend([f"{n}.journal" for n in cache_names])
+        newer = []
+
+        def check_dir(mode, deviant, mval=None):
+            if newer:
+                return
+            result = get_base_dir(self.__config, mode, deviant, mval)
+            if result is None:
+                return
+            base_dir, _rel_dir = result
+            for name in cache_names:
+                cache_file = base_dir.joinpath(name)
+                if cache_file.exists() and cache_file.stat().st_mtime > index_mtime:
+                    newer.append(cache_file)
+                    return
+
+        self.walk_queue(check_dir, True)
+        if newer:
+            logger.warning(
+                'Deviations index is older than %s, scanning directories', newer[0])
+            return False
+        return True
+
     def extract_deviant(self):
+        with DAGRDeviationIndex.create(self.__config) as index:
+            if self._index_is_current(index):
+                self._extract_deviant_indexed(index)
+                return
         self.walk_queue(self._extract_deviant, True)
         self.__deviant_gallery_cache.save(save_artists=True)
 
+    def _extract_deviant_indexed(self, index):
+        deviant_lower = self.__deviant.lower()
+        od = self.__config.output_dir
+        with self.__deviant_gallery_cache:
+            dest_dir = self.__deviant_gallery_cache.base_dir
+            dest_rel_dir = str(strip_topdirs(self.__config, dest_dir))
+            for _dev_key, entries in index.deviations.items():
+                if any(rel_dir == dest_rel_dir for rel_dir, _fname, _page in entries):
+                    continue
+                for rel_dir, fn, link in entries:
+                    if rel_dir.split('/')[0].lower() == deviant_lower:
+                        continue
+                    _artist_url_p, artist_name, _shortname = artist_from_url(link)
+                    if not str(artist_name).lower() == deviant_lower:
+                        continue
+                    source = od.joinpath(rel_dir, fn)
+                    dest = dest_dir.joinpath(fn)
+                    if dest.exists():
+                        break
+                    if source.exists():
+                        shutil.copy(source, dest)
+                        self.__deviant_gallery_cache.add_filename(fn)
+                        self.__deviant_gallery_cache.add_link(link)
+                        print(fn)
+                        break
+            self.__deviant_gallery_cache.save(save_artists=True)
+
     def _extract_deviant(self, mode, deviant, mval=None):
 
         if self.__deviant.lower() == deviant.lower():
@@ -328,6 +405,39 @@ class DAGRUtils():
         except DagrCacheLockException:
             pass
 
+    def convert_cache(self):
+        get_serializer(self.__serializer)
+        self.walk_queue(self._convert_cache, True)
+
+    def _convert_cache(self, mode, deviant, mval=None):
+        try:
+            with self.__cache.get_cache(self.__config, mode, deviant, mval, load_files=[], warn_not_found=False) as cache:
+                converted = cache.convert_serializer(self.__serializer)
+                print(
+                    f"Converted {converted} cache files in {strip_topdirs(self.__config, cache.base_dir)}")
+        except DagrCacheLockException:
+            pass
+
+    def build_index(self):
+        with DAGRDeviationIndex.create(self.__config) as index:
+            self.__deviation_index = index
+            try:
+                self.walk_queue(self._build_index, True)
+            finally:
+                self.__deviation_index = None
+            index.save(compact=True)
+            print(f'Total deviations: {len(index.deviations)}')
+
+    def _build_index(self, mode, deviant, mval=None):
+        try:
+            with self.__cache.get_cache(self.__config, mode, deviant, mval, load_files=['existing_pages', 'files_list'], warn_not_found=False) as cache:
+                added = cache.update_deviation_index(
+                    self.__deviation_index, full=True)
+                print(
+                    f"Indexed {added} deviations in {strip_topdirs(self.__config, cache.base_dir)}")
+        except DagrCacheLockException:
+            pass
+
     def find_nolinks(self):
         self.walk_queue(self._find_nolinks, True)
 
@@ -339,7 +449,11 @@ class DAGRUtils():
 
     def find_dupes(self):
         walk_st = time()
-        self.walk_queue(self._find_dupes, True)
+        with DAGRDeviationIndex.create(self.__config) as index:
+            if self._index_is_current(index):
+                self._find_dupes_indexed(index)
+            else:
+                self.walk_queue(self._find_dupes, True)
         print(f"walk took {time() - walk_st} seconds")
         filtered_dups = {}
         duplicates = {k: v for k,
@@ -356,6 +470,16 @@ class DAGRUtils():
         of = od.joinpath('.duplicates.json')
         buffered_file_write(real_dups, of)
 
+    def _find_dupes_indexed(self, index):
+        for _dev_key, entries in index.duplicates().items():
+            for rel_dir, file_name, _page in entries:
+                if self.__filter and not rel_dir.split('/')[0].lower() in self.__filter:
+                    continue
+                if not file_name in self.__global_files_mapping:
+                    self.__global_files_mapping[file_name] = []
+                self.__global_files_mapping[file_name].append(Path(rel_dir))
+        print(f'Total files: {len(self.__global_files_mapping)}')
+
     def _find_dupes(self, mode, deviant, mval=None):
         with self.__cache.with_filenames_only(self.__config, mode, deviant, mval, warn_not_found=False) as cache:
             rel_path = strip_topdirs(self.__config, cache.base_dir)
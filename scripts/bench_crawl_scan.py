@@ -0,0 +1,73 @@
+#! /usr/bin/env python
+"""
+Crawl page scan benchmark
+
+Usage:
+    bench_crawl_scan.py [options] [FILES ...]
+
+Options:
+    -n --repeat=N   Number of scans per page [default: 50]
+    -h --help       Show this screen
+
+FILES are saved gallery pages, a synthetic page is used when none are given.
+"""
+import re
+from pathlib import Path
+from random import Random
+from timeit import timeit
+
+from docopt import docopt
+
+from dagr_revamped.config import DAGRConfig
+from dagr_revamped.lib import CRAWL_END_MARKERS, compile_scanner
+
+
+def synthetic_page(deviations=24, filler=200):
+    rand = Random(0)
+    parts = []
+    for i in range(deviations):
+        parts.append('<div class="card">' + 'lorem ipsum dolor sit amet ' * filler)
+        parts.append(
+            f'<a href="https://www.deviantart.com/artist{i}/art/Some-Title-{rand.randint(1, 10**9)}">x</a>')
+    parts.append(CRAWL_END_MARKERS[0])
+    return ''.join(parts)
+
+
+def two_pass(art_regex, html):
+    # The scan previously done by DAGRCrawler.scan_page
+    matches = re.findall(art_regex, html, re.IGNORECASE | re.DOTALL)
+    done = re.findall(
+        f"({'|'.join(CRAWL_END_MARKERS)})", html, re.IGNORECASE | re.S)
+    return matches, bool(done)
+
+
+def single_pass(art_regex, html):
+    matches = []
+    done = False
+    for match in compile_scanner(art_regex).finditer(html):
+        if match['art'] is None:
+            done = True
+        else:
+            matches.append(match['art'])
+    return matches, done
+
+
+def main():
+    arguments = docopt(__doc__)
+    repeat = int(arguments['--repeat'])
+    art_regex = DAGRConfig().get('deviantart.regexes', 'art')
+    pages = {f: Path(f).read_text(errors='replace') for f in arguments['FILES']}
+    if not pages:
+        pages = {'synthetic': synthetic_page()}
+    for name, html in pages.items():
+        results = {}
+        for label, scan in [('two pass', two_pass), ('single pass', single_pass)]:
+            elapsed = timeit(lambda: scan(art_regex, html), number=repeat)
+            results[label] = elapsed / repeat * 1000
+        print(f"{name} ({len(html)} chars, {len(single_pass(art_regex, html)[0])} links)")
+        for label, ms in results.items():
+            print(f"    {label}: {ms:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
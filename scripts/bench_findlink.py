@@ -0,0 +1,86 @@
+#! /usr/bin/env python
+"""
+Deviation find link benchmark
+
+Usage:
+    bench_findlink.py [options] FILES ...
+
+Options:
+    -n --repeat=N   Number of passes over the corpus [default: 5]
+    -u --url=URL    Page url used to resolve links [default: https://www.deviantart.com/deviant/art/deviation-1]
+    -h --help       Show this screen
+
+FILES are saved deviation pages.
+"""
+import re
+from pathlib import Path
+from time import perf_counter
+
+from bs4 import BeautifulSoup
+from docopt import docopt
+
+from dagr_revamped.config import DAGRConfig
+from dagr_revamped.exceptions import DagrPremiumUnavailable
+from dagr_revamped.lib import fast_find_link
+
+
+def soup_find_link(content, current_url, fallback_order):
+    # The built in lookups done by DAGRDeviationProcessor.find_link
+    current_page = BeautifulSoup(content, 'lxml')
+    link_text = re.compile('Download( (Image|File))?')
+    for candidate in current_page.find_all('a', href=True):
+        if link_text.search(candidate.text):
+            if candidate.get('data-download_url'):
+                return candidate['href'], 'download'
+            break
+    img_link = current_page.find(
+        'a', {'href': re.compile(r'.*deviantart.com/download/.*')})
+    if img_link:
+        return img_link['href'], 'download'
+    stage = current_page.find('div', {'data-hook': 'art_stage'})
+    if stage:
+        img_tag = stage.find('img')
+        if img_tag:
+            return img_tag.get('src'), 'art_stage'
+    search_tags = {
+        'img full': current_page.find('img', {'collect_rid': True, 'class': re.compile('.*full.*|dev-content-full')}),
+        'meta': current_page.find('meta', {'property': 'og:image'}),
+        'img normal': current_page.find('img', {'collect_rid': True, 'class': re.compile('.*normal.*|dev-content-normal')})
+    }
+    for si in fallback_order:
+        tag = search_tags.get(si)
+        if tag:
+            return tag.get('content' if si == 'meta' else 'src'), si
+    return None
+
+
+def run(find_func, corpus, url, fallback_order, repeat):
+    found = 0
+    start = perf_counter()
+    for _i in range(repeat):
+        for content in corpus:
+            try:
+                if find_func(content, url, fallback_order):
+                    found += 1
+            except DagrPremiumUnavailable:
+                found += 1
+    return perf_counter() - start, found // repeat
+
+
+def main():
+    arguments = docopt(__doc__)
+    repeat = int(arguments['--repeat'])
+    url = arguments['--url']
+    fallback_order = [s.strip() for s in DAGRConfig().get(
+        'dagr.findlink', 'fallbackorder').split(',')]
+    corpus = [Path(f).read_bytes() for f in arguments['FILES']]
+    print(f"{len(corpus)} pages, {sum(map(len, corpus))} bytes")
+    for label, find_func in [('soup', soup_find_link), ('fast path', fast_find_link)]:
+        elapsed, found = run(find_func, corpus, url,
+                             fallback_order, repeat)
+        pages_sec = len(corpus) * repeat / elapsed if elapsed else 0
+        print(f"    {label}: {pages_sec:.1f} pages/s, {found} links found")
+
+
+if __name__ == '__main__':
+    main()
@@ -28,7 +28,9 @@ setup(
         'calmjs':  ['calmjs==3.3.1'],
         'selenium': ['selenium==3.141.0'],
         'easywebdav': ['easywebdav==1.2.0'],
-        'full': ['calmjs', 'selenium', 'easywebdav']
+        'msgpack': ['msgpack>=1.0.0'],
+        'async': ['aiohttp>=3.8.0'],
+        'full': ['calmjs', 'selenium', 'easywebdav', 'msgpack', 'async']
     },
     classifiers=[
         'Programming Language :: Python :: 3',
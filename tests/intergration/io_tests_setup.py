@@ -1,4 +1,5 @@
 import logging
+import unittest
 from os import environ
 from pathlib import Path
 from shutil import rmtree
@@ -7,6 +8,7 @@ from time import sleep
 import docker
 from dagr_revamped.builtin_plugins.classes.DAGRHTTPIo import DAGRHTTPIo
 from dagr_revamped.config import DAGRConfig
+from dagr_revamped.DAGRCache import DAGRCache, loaded_cache_files
 from dagr_revamped.DAGRIo import DAGRIo
 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=5)
@@ -79,3 +81,40 @@ def tearDownTestCase(testcase):
     testcase.container.remove()
     if environ.get('DISABLE_DIR_CLEANUP', 'FALSE') != 'TRUE':
         rmtree(testcase.results_dir)
+
+
+def page_url(i):
+    return f"https://www.deviantart.com/artist/art/Deviation-{i}"
+
+
+class CacheTestCase(unittest.TestCase):
+    # Subdirectory of the results dir the cache is opened in
+    cache_dir_name = 'cache'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.container = None
+        self.results_dir = None
+        self.cache_dir = None
+
+    def containerLogs(self):
+        for log_item in self.container.logs(stdout=True, stderr=True, stream=True, follow=False):
+            logging.info(log_item.decode('utf-8'))
+
+    def setUp(self):
+        setUpTestCase(self)
+        self.cache_dir = self.results_dir.joinpath(self.cache_dir_name)
+        self.cache_dir.mkdir()
+        loaded_cache_files.clear()
+
+    def open_cache(self, journal=None):
+        if not journal is None:
+            config.set_key('dagr.cache', 'journal', journal)
+        cache_io = create_io(self, select_io_class(),
+                             base_dir=self.cache_dir, rel_dir=self.cache_dir.name)
+        if journal and not cache_io.supports_journal:
+            self.skipTest('Cache io does not support journals')
+        return DAGRCache(config, cache_io)
+
+    def tearDown(self):
+        tearDownTestCase(self)
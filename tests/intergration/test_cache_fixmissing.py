@@ -0,0 +1,44 @@
+import unittest
+
+from io_tests_setup import CacheTestCase, config, page_url
+
+
+class TestCacheFixMissing(CacheTestCase):
+    cache_dir_name = 'fixmissing'
+
+    def prune_missing(self, journal):
+        cache = self.open_cache(journal)
+        for i in range(10):
+            fname = f"Deviation-{i}.jpg"
+            cache.add_filename(fname)
+            cache.add_link(page_url(i))
+            if i < 5:
+                self.cache_dir.joinpath(fname).write_bytes(b'content')
+        cache.save()
+
+        cache = self.open_cache(journal)
+        missing = cache.missing_filenames()
+        self.assertEqual(missing, {f"Deviation-{i}.jpg" for i in range(5, 10)})
+        self.assertEqual(cache.prune_filenames(missing), 5)
+        self.assertEqual(cache.prune_filename('Deviation-9.jpg'), 0)
+        # Nothing was downloaded, the pruned list still has to be saved
+        cache.save()
+
+        reloaded = self.open_cache(journal)
+        self.assertEqual(sorted(reloaded.files_list),
+                         [f"Deviation-{i}.jpg" for i in range(5)])
+        self.assertEqual(reloaded.missing_filenames(), set())
+
+    def test_prune_missing(self):
+        self.prune_missing(journal=False)
+
+    def test_prune_missing_journal(self):
+        self.prune_missing(journal=True)
+
+    def tearDown(self):
+        config.set_key('dagr.cache', 'journal', False)
+        super().tearDown()
+
+
+if __name__ == '__main__':
+    unittest.main()
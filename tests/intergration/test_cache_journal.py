@@ -0,0 +1,79 @@
+import unittest
+
+from io_tests_setup import CacheTestCase, config, page_url
+
+
+class TestCacheJournal(CacheTestCase):
+    cache_dir_name = 'journal'
+
+    def open_cache(self, journal, compact_threshold=5000):
+        config.set_key('dagr.cache', 'journalcompactthreshold',
+                       compact_threshold)
+        return super().open_cache(journal)
+
+    def add_pages(self, cache, start, stop, save_every=50):
+        for i in range(start, stop):
+            cache.add_filename(f"Deviation-{i}.jpg")
+            cache.add_link(page_url(i))
+            if (i + 1) % save_every == 0:
+                cache.save()
+        cache.save()
+
+    def journal_lines(self, cache):
+        journal_file = self.cache_dir.joinpath(f"{cache.ep_name}.journal")
+        if not journal_file.exists():
+            return []
+        return [l for l in journal_file.read_text().splitlines() if l.strip()]
+
+    def test_journal_round_trip(self):
+        cache = self.open_cache(journal=True)
+        self.add_pages(cache, 0, 150)
+        self.assertEqual(len(self.journal_lines(cache)), 100)
+
+        reloaded = self.open_cache(journal=True)
+        self.assertEqual(len(reloaded.existing_pages), 150)
+        self.assertTrue(all(reloaded.check_link(page_url(i))
+                            for i in range(150)))
+
+    def test_journal_replayed_when_disabled(self):
+        cache = self.open_cache(journal=True)
+        self.add_pages(cache, 0, 150)
+
+        reloaded = self.open_cache(journal=False)
+        self.assertEqual(len(reloaded.existing_pages), 150)
+        self.add_pages(reloaded, 150, 151)
+        # The journal is folded into the snapshot by the first save
+        self.assertEqual(self.journal_lines(reloaded), [])
+
+        snapshot = self.open_cache(journal=False)
+        self.assertEqual(len(snapshot.existing_pages), 151)
+
+    def test_journal_compaction(self):
+        cache = self.open_cache(journal=True, compact_threshold=120)
+        self.add_pages(cache, 0, 150, save_every=10)
+        self.assertLess(len(self.journal_lines(cache)), 120)
+
+        reloaded = self.open_cache(journal=True, compact_threshold=120)
+        self.assertEqual(len(reloaded.existing_pages), 150)
+
+    def test_links_only_keeps_filenames(self):
+        cache = self.open_cache(journal=False)
+        self.add_pages(cache, 0, 5)
+
+        # The files list is never loaded by this cache
+        links_only = self.open_cache(journal=False)
+        links_only.add_link(page_url(5))
+        links_only.save()
+
+        reloaded = self.open_cache(journal=False)
+        self.assertEqual(len(reloaded.files_list), 5)
+        self.assertEqual(len(reloaded.existing_pages), 6)
+
+    def tearDown(self):
+        config.set_key('dagr.cache', 'journal', False)
+        config.set_key('dagr.cache', 'journalcompactthreshold', 5000)
+        super().tearDown()
+
+
+if __name__ == '__main__':
+    unittest.main()
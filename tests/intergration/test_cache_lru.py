@@ -0,0 +1,29 @@
+import unittest
+
+from io_tests_setup import CacheTestCase, page_url
+
+
+class TestCacheLRU(CacheTestCase):
+    cache_dir_name = 'lru'
+
+    def test_shared_contents_not_mutated(self):
+        cache = self.open_cache()
+        for i in range(10):
+            cache.add_filename(f"Deviation-{i}.jpg")
+            cache.add_link(page_url(i))
+        cache.save(save_artists='force')
+
+        first = self.open_cache()
+        second = self.open_cache()
+        first.artists.add('artist', 'https://www.deviantart.com/artist',
+                          'Extra-1.jpg', page_url(100))
+        first.existing_pages.add(page_url(100))
+
+        self.assertIsNone(second.artists.page_for('Extra-1.jpg'))
+        self.assertEqual(len(second.existing_pages), 10)
+        self.assertEqual(
+            len(self.open_cache().artists['artist']['Artworks']), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from dagr_revamped.exceptions import DagrException
+from io_tests_setup import CacheTestCase, page_url
+
+
+class TestCacheSerializers(CacheTestCase):
+    cache_dir_name = 'serializers'
+
+    def add_pages(self, cache, start, stop):
+        for i in range(start, stop):
+            cache.add_filename(f"Deviation-{i}.jpg")
+            cache.add_link(page_url(i))
+        cache.save()
+
+    def test_convert_persists(self):
+        cache = self.open_cache()
+        self.add_pages(cache, 0, 10)
+        if not cache.cache_io.supports_serializers:
+            with self.assertRaises(DagrException):
+                cache.convert_serializer('compact')
+            return
+        cache.convert_serializer('compact')
+        pages_file = self.cache_dir.joinpath(cache.ep_name)
+        self.assertNotIn(b'\n', pages_file.read_bytes())
+
+        # An ordinary save must keep the converted format
+        reopened = self.open_cache()
+        self.add_pages(reopened, 10, 11)
+        self.assertNotIn(b'\n', pages_file.read_bytes())
+        self.assertEqual(len(self.open_cache().existing_pages), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
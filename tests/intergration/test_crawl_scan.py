@@ -0,0 +1,56 @@
+import re
+import unittest
+
+from dagr_revamped.lib import CRAWL_END_MARKERS, compile_scanner
+
+HTML = '''
+<a href="https://www.deviantart.com/artist/art/Deviation-1">one</a>
+<a href="ttps://www.deviantart.com/artist/art/Deviation-2">two</a>
+<a href="HTTPS://www.deviantart.com/artist/art/Deviation-3">three</a>
+<a href="eviantart.com/artist/art/Deviation-4">four</a>
+<span>b ab aab xb</span>
+<p>{}</p>
+'''.format(CRAWL_END_MARKERS[0])
+
+PATTERNS = [
+    r"https://(www\.)?deviantart\.com/[a-zA-Z0-9_-]*/art/[a-zA-Z0-9_-]*",
+    r"h?ttps://www\.deviantart\.com/[a-zA-Z0-9_-]*/art/[a-zA-Z0-9_-]*",
+    r"h*ttps://www\.deviantart\.com/[a-zA-Z0-9_-]*/art/[a-zA-Z0-9_-]*",
+    r"h{0,1}ttps://www\.deviantart\.com/[a-zA-Z0-9_-]*/art/[a-zA-Z0-9_-]*",
+    r"d?eviantart\.com/[a-zA-Z0-9_-]*/art/[a-zA-Z0-9_-]*",
+    r"a*b",
+    r"a+b",
+    r"xb|ab"
+]
+
+
+def baseline(art_regex, html):
+    matches = [m[0] for m in re.finditer(
+        art_regex, html, re.IGNORECASE | re.DOTALL)]
+    done = re.findall(
+        f"({'|'.join(map(re.escape, CRAWL_END_MARKERS))})", html, re.IGNORECASE | re.DOTALL)
+    return matches, bool(done)
+
+
+def scan(art_regex, html):
+    matches = []
+    done = False
+    for match in compile_scanner(art_regex).finditer(html):
+        if match['art'] is None:
+            done = True
+        else:
+            matches.append(match['art'])
+    return matches, done
+
+
+class TestCrawlScan(unittest.TestCase):
+
+    def test_scanner_matches_baseline(self):
+        for art_regex in PATTERNS:
+            with self.subTest(art_regex=art_regex):
+                self.assertEqual(scan(art_regex, HTML),
+                                 baseline(art_regex, HTML))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from dagr_revamped.DAGRDeviationIndex import DAGRDeviationIndex
+from io_tests_setup import CacheTestCase, config, page_url
+
+
+class TestDeviationIndex(CacheTestCase):
+    cache_dir_name = 'artist'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.output_dir = None
+
+    def setUp(self):
+        super().setUp()
+        self.output_dir = config.get('dagr', 'outputdirectory')
+        config.set_key('dagr', 'outputdirectory', str(self.results_dir))
+        config.set_key('dagr.cache', 'deviationindex', True)
+
+    def test_only_new_pages_indexed(self):
+        cache = self.open_cache()
+        for i in range(150):
+            cache.add_filename(f"Deviation-{i}.jpg")
+            cache.add_link(page_url(i))
+            if (i + 1) % 50 == 0:
+                cache.save()
+        cache.save()
+
+        journal_file = self.results_dir.joinpath('.deviations.journal')
+        if cache.cache_io.supports_journal:
+            lines = [l for l in journal_file.read_text().splitlines()
+                     if l.strip()]
+            self.assertEqual(len(lines), 150)
+
+        with DAGRDeviationIndex.create(config) as index:
+            self.assertEqual(len(index.deviations), 150)
+            self.assertEqual(index.lookup(7), [
+                ['artist', 'Deviation-7.jpg', page_url(7)]])
+            self.assertFalse(index.add(7, 'artist', 'Deviation-7.jpg', page_url(7)))
+
+    def test_compact_keeps_other_writers(self):
+        with DAGRDeviationIndex.create(config) as first, DAGRDeviationIndex.create(config) as second:
+            # Loaded before the other writer saved anything
+            self.assertEqual(len(second.deviations), 0)
+            first.add(1, 'artist', 'Deviation-1.jpg', page_url(1))
+            first.save()
+            second.add(2, 'other', 'Deviation-2.jpg', page_url(2))
+            second.save(compact=True)
+
+        with DAGRDeviationIndex.create(config) as index:
+            self.assertEqual(len(index.deviations), 2)
+            self.assertEqual(index.lookup(1), [
+                ['artist', 'Deviation-1.jpg', page_url(1)]])
+
+    def test_index_mtime(self):
+        with DAGRDeviationIndex.create(config) as index:
+            self.assertFalse(index.exists())
+            self.assertIsNone(index.mtime())
+        cache = self.open_cache()
+        cache.add_filename('Deviation-1.jpg')
+        cache.add_link(page_url(1))
+        cache.save()
+
+        pages_file = self.cache_dir.joinpath(cache.ep_name)
+        with DAGRDeviationIndex.create(config) as index:
+            self.assertTrue(index.exists())
+            self.assertGreaterEqual(
+                index.mtime(), pages_file.stat().st_mtime)
+
+    def tearDown(self):
+        config.set_key('dagr.cache', 'deviationindex', False)
+        config.set_key('dagr', 'outputdirectory', self.output_dir)
+        super().tearDown()
+
+
+if __name__ == '__main__':
+    unittest.main()
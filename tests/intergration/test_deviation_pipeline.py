@@ -0,0 +1,190 @@
+import asyncio
+import unittest
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from requests.exceptions import ChunkedEncodingError
+from requests.structures import CaseInsensitiveDict
+
+from dagr_revamped.config import DAGRConfig
+from dagr_revamped.DAGRAsync import DAGRAsync, aiohttp
+from dagr_revamped.DAGRCache import DAGRCache, loaded_cache_files
+from dagr_revamped.DAGRIo import DAGRIo
+from dagr_revamped.exceptions import DagrException
+from dagr_revamped.lib import DAGR
+
+BODY = b'x' * 3000
+
+
+def page_url(i):
+    return f"https://www.deviantart.com/artist/art/Deviation-{i}"
+
+
+class NoPlugins():
+    def __init__(self, ripper):
+        pass
+
+    def get_funcs(self, _name):
+        return {}
+
+    def shutdown(self):
+        pass
+
+
+class MediaResponse():
+    def __init__(self, start=0, fail_after=None):
+        self.status_code = 206 if start else 200
+        self.start = start
+        self.fail_after = fail_after
+        headers = {'content-length': str(len(BODY) - start), 'etag': '"e"'}
+        if start:
+            headers['content-range'] = f"bytes {start}-{len(BODY) - 1}/{len(BODY)}"
+        self.headers = CaseInsensitiveDict(headers)
+
+    def iter_content(self, _chunk_size):
+        end = len(BODY) if self.fail_after is None else self.start + self.fail_after
+        yield BODY[self.start:end]
+        if not self.fail_after is None:
+            raise ChunkedEncodingError('Connection broken')
+
+    def close(self):
+        pass
+
+
+class StubProcessor():
+    # Fails resolving or downloading depending on the page link
+    def __init__(self, ripper, cache, page_link, **kwargs):
+        self.ripper = ripper
+        self.reset(cache, page_link, **kwargs)
+
+    def reset(self, cache, page_link, **kwargs):
+        self.cache = cache
+        self.page_link = page_link
+        self.found_type = None
+
+    def resolve_deviation(self):
+        if page_link_no(self.page_link) % 3 == 1:
+            raise DagrException('Resolve failed')
+        return True
+
+    def save_content(self):
+        if page_link_no(self.page_link) % 3 == 2:
+            raise DagrException('Failed to save content: chunkedencodingerror')
+
+    def record_download(self):
+        self.cache.add_filename(f"{self.page_link.rsplit('/', 1)[-1]}.jpg")
+
+    def handle_error(self, ex):
+        self.ripper.handle_download_error(self.page_link, ex)
+
+    def close_response(self):
+        pass
+
+
+def page_link_no(page_link):
+    return int(page_link.rsplit('-', 1)[-1])
+
+
+class PipelineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.results_dir = Path(mkdtemp())
+        loaded_cache_files.clear()
+        self.config = DAGRConfig(include=[Path(__file__).parent])
+        for rate_class in ['page', 'media', 'resolve', 'crawl']:
+            self.config.set_key('dagr.ratelimits', rate_class, 0)
+        self.config.set_key('dagr.retry', 'sleepduration', 0)
+        self.ripper = DAGR(config=self.config, pl_manager=NoPlugins)
+        self.cache_io = DAGRIo.create(self.results_dir, '', self.config)
+        self.cache = DAGRCache(self.config, self.cache_io)
+
+    def tearDown(self):
+        self.cache_io.close()
+        rmtree(self.results_dir)
+
+
+class TestSaveContent(PipelineTestCase):
+
+    def processor(self, get, get_response=None):
+        self.ripper.get = get
+        self.ripper.get_response = get_response
+        dp = self.ripper.deviation_processor(
+            self.ripper, self.cache, page_url(1), filename='Deviation-1.jpg', file_link='https://x/f')
+        dp.find_link = lambda: ('https://x/f', 'download')
+        return dp
+
+    def test_resume_after_broken_body(self):
+        ranges = []
+
+        def get_response(_url, stream=True, headers=None):
+            start = int(headers['Range'][len('bytes='):-1])
+            ranges.append(start)
+            return MediaResponse(start)
+        dp = self.processor(lambda _url, **kwargs: MediaResponse(fail_after=1000),
+                            get_response)
+        dp.save_content()
+        self.assertEqual(ranges, [1000])
+        self.assertEqual(self.results_dir.joinpath(
+            'Deviation-1.jpg').read_bytes(), BODY)
+
+    def test_gives_up_after_retries(self):
+        attempts = []
+
+        def get(_url, **kwargs):
+            attempts.append(0)
+            raise ChunkedEncodingError('Connection broken')
+        dp = self.processor(get)
+        with self.assertRaises(DagrException):
+            dp.save_content()
+        self.assertEqual(len(attempts), 3)
+
+    def test_unretried_exception(self):
+        attempts = []
+
+        def get(_url, **kwargs):
+            attempts.append(0)
+            raise ValueError('Not retried')
+        dp = self.processor(get)
+        with self.assertRaises(DagrException):
+            dp.save_content()
+        self.assertEqual(len(attempts), 1)
+
+
+class TestPipelineErrors(PipelineTestCase):
+
+    def test_errors_reported_and_not_cached(self):
+        self.ripper.deviation_processor = StubProcessor
+        pages = [page_url(i) for i in range(9)]
+        self.ripper.process_deviations_pipelined(self.cache, pages, 2)
+        self.assertEqual(len(self.ripper.error_report), 6)
+        self.assertEqual(sorted(self.cache.files_list),
+                         [f"Deviation-{i}.jpg" for i in range(0, 9, 3)])
+        for i in range(9):
+            self.assertEqual(self.cache.check_link(page_url(i)), i % 3 == 0)
+
+
+@unittest.skipIf(aiohttp is None, 'Required package aiohttp not available')
+class TestAsyncErrors(PipelineTestCase):
+
+    def test_fetch_errors_do_not_abort(self):
+        class Engine(DAGRAsync):
+            async def fetch(self, url, rate_class, headers=None, stream=False):
+                if page_link_no(url) == 1:
+                    raise asyncio.TimeoutError()
+                raise aiohttp.ClientError('Connection reset')
+        engine = Engine(self.ripper)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(engine.process_deviations_async(
+                self.cache, iter([page_url(i) for i in range(1, 4)])))
+        finally:
+            loop.close()
+        self.assertEqual([str(ex) for ex in self.ripper.error_report], [
+            f"Failed to get url: {page_url(1)} timeouterror",
+            f"Failed to get url: {page_url(2)} clienterror",
+            f"Failed to get url: {page_url(3)} clienterror"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ import unittest
 from os import urandom
 from pathlib import Path
 
+from dagr_revamped.exceptions import DagrIncompleteDownload
 from io_tests_setup import (create_io, select_io_class, setUpTestCase,
                          tearDownTestCase)
 
@@ -38,6 +39,97 @@ class TestIO(unittest.TestCase):
 
         self.assertEqual(result , 1000000)
 
+    def test_exists_many(self):
+        many_dir = self.results_dir.joinpath('exists_many')
+        many_dir.mkdir()
+        for fname in ['first', 'second']:
+            many_dir.joinpath(fname).write_bytes(b'content')
+        with create_io(self, select_io_class(), base_dir=many_dir, rel_dir=many_dir.name) as io:
+            self.assertEqual(io.exists_many(
+                ['first', 'second', 'third']), {'first', 'second'})
+            self.assertEqual(io.exists_many([]), set())
+
+    def test_read_append_lines(self):
+        lines_dir = self.results_dir.joinpath('lines')
+        lines_dir.mkdir()
+        with create_io(self, select_io_class(), base_dir=lines_dir, rel_dir=lines_dir.name) as io:
+            if not io.supports_journal:
+                self.skipTest('Io does not support journals')
+            self.assertEqual(io.read_lines('journal'), [])
+            io.append_lines('journal', ['first', 'second'])
+            io.append_lines('journal', ['third'])
+            self.assertEqual(io.read_lines('journal'), [
+                             'first', 'second', 'third'])
+
+    def test_append_lines_partial_entry(self):
+        lines_dir = self.results_dir.joinpath('lines')
+        lines_dir.mkdir()
+        # An entry cut short by an interrupted write is kept on its own line
+        lines_dir.joinpath('journal').write_text('first\nsec')
+        with create_io(self, select_io_class(), base_dir=lines_dir, rel_dir=lines_dir.name) as io:
+            if not io.supports_journal:
+                self.skipTest('Io does not support journals')
+            io.append_lines('journal', ['third'])
+            self.assertEqual(io.read_lines('journal'), [
+                             'first', 'sec', 'third'])
+
+    def create_partial(self, io, content, received):
+        if not io.supports_resume:
+            self.skipTest('Io does not support resume')
+        with self.assertRaises(DagrIncompleteDownload):
+            io.write_bytes(content[:received], fname='partial', subdir='resume',
+                           expected_size=len(content), validators={'etag': '"v1"'})
+
+    def test_partial_info(self):
+        self.results_dir.joinpath('resume').mkdir()
+        content = urandom(1000)
+        with create_io(self, select_io_class()) as io:
+            self.assertIsNone(io.partial_info(fname='partial', subdir='resume'))
+            self.create_partial(io, content, 400)
+            info = io.partial_info(fname='partial', subdir='resume')
+            self.assertEqual(info['received'], 400)
+            self.assertEqual(info['size'], 1000)
+            self.assertEqual(info['etag'], '"v1"')
+
+    def test_write_bytes_offset(self):
+        resume_dir = self.results_dir.joinpath('resume')
+        resume_dir.mkdir()
+        content = urandom(1000)
+        with create_io(self, select_io_class()) as io:
+            self.create_partial(io, content, 400)
+            result = io.write_bytes(content[400:], fname='partial', subdir='resume', offset=400,
+                                    expected_size=1000, validators={'etag': '"v1"'})
+            self.assertEqual(result, 1000)
+            self.assertEqual(resume_dir.joinpath('partial').read_bytes(), content)
+            self.assertIsNone(io.partial_info(fname='partial', subdir='resume'))
+            self.assertEqual(sorted(p.name for p in resume_dir.iterdir()), ['partial'])
+
+    def test_write_bytes_offset_partial_missing(self):
+        resume_dir = self.results_dir.joinpath('resume')
+        resume_dir.mkdir()
+        content = urandom(1000)
+        with create_io(self, select_io_class()) as io:
+            self.create_partial(io, content, 400)
+            resume_dir.joinpath('partial.tmp').unlink()
+            with self.assertRaises(DagrIncompleteDownload):
+                io.write_bytes(content[400:], fname='partial', subdir='resume', offset=400,
+                               expected_size=1000, validators={'etag': '"v1"'})
+            self.assertEqual(list(resume_dir.iterdir()), [])
+
+    def test_write_bytes_expected_size(self):
+        resume_dir = self.results_dir.joinpath('resume')
+        resume_dir.mkdir()
+        content = urandom(1000)
+        with create_io(self, select_io_class()) as io:
+            self.create_partial(io, content, 400)
+            self.assertFalse(resume_dir.joinpath('partial').exists())
+            # More bytes than expected can't be resumed and are discarded
+            with self.assertRaises(DagrIncompleteDownload):
+                io.write_bytes(content + content[:200], fname='partial', subdir='resume',
+                               expected_size=1000, validators={'etag': '"v1"'})
+            self.assertIsNone(io.partial_info(fname='partial', subdir='resume'))
+            self.assertEqual(list(resume_dir.iterdir()), [])
+
 
     def tearDown(self):
         tearDownTestCase(self)
@@ -0,0 +1,47 @@
+import unittest
+
+from bs4 import BeautifulSoup
+
+from dagr_revamped.PageContext import PageContext
+
+URL = 'https://www.deviantart.com/artist/art/Deviation-1'
+
+HTML = b'''
+<html><body>
+<script type="text/javascript">window.__INITIAL_STATE__ = {"deviation": 1};</script>
+<script type="text/javascript" src="/bundle.js"></script>
+<script type="text/javascript"></script>
+<script type="text/javascript">window.other = true;</script>
+</body></html>
+'''
+
+
+class TestPageContext(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = 0
+
+    def load_soup(self):
+        self.loads += 1
+        return BeautifulSoup(HTML, 'lxml')
+
+    def test_scripts_parsed_once(self):
+        context = PageContext(URL, HTML, self.load_soup)
+        self.assertEqual(self.loads, 0)
+        self.assertEqual(len(context.scripts), 2)
+        self.assertIn('deviation', context.find_script('__INITIAL_STATE__'))
+        self.assertIsNone(context.find_script('missing'))
+        self.assertEqual(self.loads, 1)
+
+    def test_browser_reopens_page(self):
+        context = PageContext(URL, HTML, self.load_soup)
+        browser = context.browser
+        self.assertEqual(browser.get_url(), URL)
+        # A plugin navigating away must not leak into the next user
+        browser.open_fake_page(b'<html></html>', 'https://www.deviantart.com/')
+        self.assertEqual(context.browser.get_url(), URL)
+        self.assertIs(context.browser, browser)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from pathlib import Path
+
+from dagr_revamped.config import DAGRConfig
+from dagr_revamped.RateLimiter import AdaptivePacer, RateLimiter, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_unlimited(self):
+        bucket = TokenBucket(0)
+        self.assertEqual([bucket.reserve() for _i in range(5)], [0] * 5)
+
+    def test_burst_then_interval(self):
+        bucket = TokenBucket(10, capacity=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 10, delta=0.1)
+        # Reservations queue up behind each other
+        self.assertAlmostEqual(bucket.reserve(), 20, delta=0.1)
+
+    def test_min_interval(self):
+        bucket = TokenBucket(0)
+        self.assertEqual(bucket.reserve(5), 0)
+        self.assertAlmostEqual(bucket.reserve(5), 5, delta=0.1)
+
+
+class TestAdaptivePacer(unittest.TestCase):
+
+    def test_backoff_and_recover(self):
+        pacer = AdaptivePacer([429], backoff=2.0, initial=1.0,
+                              recover_after=2, recover_step=0.5)
+        self.assertFalse(pacer.feedback(200))
+        self.assertEqual(pacer.interval, 0)
+        self.assertTrue(pacer.feedback(429))
+        self.assertEqual(pacer.interval, 1.0)
+        self.assertEqual(pacer.throttled, 1)
+        # Throttled together with the previous response, no second backoff
+        pacer.feedback(429)
+        self.assertEqual(pacer.interval, 1.0)
+        for _i in range(2):
+            pacer.feedback(200)
+        self.assertEqual(pacer.interval, 0.5)
+
+    def test_max_interval(self):
+        pacer = AdaptivePacer([503], initial=10, max_interval=5)
+        pacer.feedback(503)
+        self.assertEqual(pacer.interval, 5)
+
+    def test_retry_after_hold(self):
+        pacer = AdaptivePacer([429])
+        self.assertEqual(pacer.hold(), 0)
+        pacer.feedback(429, {'Retry-After': '30'})
+        self.assertAlmostEqual(pacer.hold(), 30, delta=0.5)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.config = DAGRConfig(include=[Path(__file__).parent])
+
+    def test_create(self):
+        limiter = RateLimiter.create(self.config)
+        intervals = limiter.intervals()
+        self.assertEqual(set(intervals), {'page', 'media', 'resolve', 'crawl'})
+        self.assertEqual(intervals['page'], intervals['media'])
+        self.assertTrue(limiter.pacer.is_throttle(429))
+        self.assertFalse(limiter.pacer.is_throttle(404))
+
+    def test_legacy_download_delay(self):
+        self.config.set_key('dagr', 'downloaddelay', 3)
+        intervals = RateLimiter.create(self.config).intervals()
+        self.assertEqual(intervals['page'], 3)
+        self.assertEqual(intervals['media'], 3)
+
+    def test_pacer_applies_to_every_class(self):
+        limiter = RateLimiter({'page': 0, 'crawl': 0},
+                              pacer=AdaptivePacer([429], initial=4))
+        self.assertEqual(limiter.reserve('page'), 0)
+        limiter.feedback(429)
+        self.assertEqual(limiter.intervals(), {'page': 4, 'crawl': 4})
+        # The unused burst token is spent first
+        self.assertEqual(limiter.reserve('page'), 0)
+        self.assertAlmostEqual(limiter.reserve('page'), 4, delta=0.1)
+        self.assertEqual(limiter.backoff_delay(), 4)
+        # Unconfigured classes are created on first use
+        self.assertEqual(limiter.reserve('other'), 0)
+        self.assertEqual(limiter.rates()['page'], 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()